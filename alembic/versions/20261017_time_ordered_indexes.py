@@ -0,0 +1,42 @@
+"""time ordered indexes
+
+Revision ID: 20261017_time_ordered_indexes
+Revises: 20261017_vehicle_search_index
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017_time_ordered_indexes'
+down_revision = '20261017_vehicle_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_vehicles_entry_timestamp_id',
+        'vehicles',
+        ['entry_timestamp', 'id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_audit_logs_entity_timestamp',
+        'audit_logs',
+        ['entity', 'timestamp'],
+        unique=False
+    )
+    op.create_index(
+        'ix_audit_logs_timestamp',
+        'audit_logs',
+        ['timestamp'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_logs_timestamp', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_entity_timestamp', table_name='audit_logs')
+    op.drop_index('ix_vehicles_entry_timestamp_id', table_name='vehicles')
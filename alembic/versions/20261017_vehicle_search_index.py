@@ -0,0 +1,83 @@
+"""vehicle search index
+
+Revision ID: 20261017_vehicle_search_index
+Revises: 20250126_initial_schema
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017_vehicle_search_index'
+down_revision = '20250126_initial_schema'
+branch_labels = None
+depends_on = None
+
+# FTS5 trigram table kept in sync with vehicles by triggers
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS vehicles_fts USING fts5(
+        number_plate,
+        contact_name,
+        content='vehicles',
+        content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vehicles_fts_ai AFTER INSERT ON vehicles BEGIN
+        INSERT INTO vehicles_fts(rowid, number_plate, contact_name)
+        VALUES (new.id, new.number_plate, new.contact_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vehicles_fts_ad AFTER DELETE ON vehicles BEGIN
+        INSERT INTO vehicles_fts(vehicles_fts, rowid, number_plate, contact_name)
+        VALUES ('delete', old.id, old.number_plate, old.contact_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vehicles_fts_au AFTER UPDATE ON vehicles BEGIN
+        INSERT INTO vehicles_fts(vehicles_fts, rowid, number_plate, contact_name)
+        VALUES ('delete', old.id, old.number_plate, old.contact_name);
+        INSERT INTO vehicles_fts(rowid, number_plate, contact_name)
+        VALUES (new.id, new.number_plate, new.contact_name);
+    END
+    """,
+    "INSERT INTO vehicles_fts(vehicles_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS vehicles_fts_au",
+    "DROP TRIGGER IF EXISTS vehicles_fts_ad",
+    "DROP TRIGGER IF EXISTS vehicles_fts_ai",
+    "DROP TABLE IF EXISTS vehicles_fts",
+]
+
+# pg_trgm GIN indexes
+POSTGRESQL_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_vehicles_number_plate_trgm "
+    "ON vehicles USING gin (number_plate gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_vehicles_contact_name_trgm "
+    "ON vehicles USING gin (contact_name gin_trgm_ops)",
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_vehicles_contact_name_trgm",
+    "DROP INDEX IF EXISTS ix_vehicles_number_plate_trgm",
+]
+
+
+def _run(statements: dict) -> None:
+    for statement in statements.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    _run({"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRESQL_UPGRADE})
+
+
+def downgrade() -> None:
+    _run({"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRESQL_DOWNGRADE})
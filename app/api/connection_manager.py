@@ -0,0 +1,258 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional, Set
+
+import orjson
+from fastapi import WebSocket, WebSocketDisconnect
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+from app.core.metrics import gauge_function
+from app.services.events import occupancy_hub, Subscription
+
+WS_CONNECTIONS = Gauge(
+    "websocket_connections",
+    "Open WebSocket connections",
+    multiprocess_mode="livesum"
+)
+
+WS_CONNECTIONS_REJECTED = Counter(
+    "websocket_connections_rejected_total",
+    "WebSocket connections refused because MAX_WEBSOCKET_CONNECTIONS was reached"
+)
+
+WS_IDLE_EVICTIONS = Counter(
+    "websocket_idle_evictions_total",
+    "WebSocket connections closed after WS_IDLE_TIMEOUT_SECONDS without traffic"
+)
+
+WS_MESSAGES = Counter(
+    "websocket_messages_total",
+    "WebSocket messages by direction and type",
+    ["direction", "type"]
+)
+
+WS_SEARCH_LATENCY = Histogram(
+    "websocket_search_duration_seconds",
+    "Time to answer a WebSocket search"
+)
+
+WS_SEARCHES_SUPERSEDED = Counter(
+    "websocket_searches_superseded_total",
+    "WebSocket searches cancelled because a newer one arrived first"
+)
+
+# Queued in a connection's outbox to close it once earlier messages are sent
+_CLOSE = object()
+
+MessageHandler = Callable[["Connection", Dict[str, Any]], Awaitable[None]]
+
+
+class Connection:
+    """
+    One accepted WebSocket and the tasks serving it.
+
+    A reader task dispatches incoming messages to the handler; a writer task
+    drains a bounded outbox. A handler awaiting send() on a full outbox stops
+    reading further messages, so a client that does not read its replies
+    cannot make the server buffer them without limit.
+    """
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.last_activity = time.monotonic()
+        self.close_code = 1000
+        self.subscription: Optional[Subscription] = None
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self._forwarder: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._search: Optional[asyncio.Task] = None
+
+    def touch(self) -> None:
+        self.last_activity = time.monotonic()
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        """Queue a message, waiting while the outbox is full."""
+        await self._outbox.put(message)
+
+    def send_nowait(self, message: Dict[str, Any]) -> bool:
+        """Queue a message unless the outbox is full. Returns whether it was queued."""
+        try:
+            self._outbox.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self, code: int = 1000) -> None:
+        """Close after the messages already queued have been sent."""
+        self.close_code = code
+        if not self.send_nowait(_CLOSE) and self._writer is not None:
+            # Backed up: close without flushing
+            self._writer.cancel()
+
+    def cancel_search(self) -> None:
+        """Cancel the search in flight, if any."""
+        if self._search is not None and not self._search.done():
+            self._search.cancel()
+            WS_SEARCHES_SUPERSEDED.inc()
+        self._search = None
+
+    def run_search(self, coro: Coroutine[Any, Any, None]) -> None:
+        """
+        Run coro as this connection's search in the background, cancelling
+        the previous one if it has not finished. Only the latest search a
+        client sent is ever answered.
+        """
+        self.cancel_search()
+        self._search = asyncio.create_task(coro)
+
+    def subscribe(self) -> None:
+        """Start forwarding occupancy events to this client."""
+        if self.subscription is None:
+            self.subscription = occupancy_hub.subscribe()
+            self._forwarder = asyncio.create_task(self._forward_occupancy())
+
+    def unsubscribe(self) -> None:
+        if self.subscription is not None:
+            self._forwarder.cancel()
+            occupancy_hub.unsubscribe(self.subscription)
+            self.subscription = self._forwarder = None
+
+    async def _forward_occupancy(self) -> None:
+        while True:
+            event = await self.subscription.get()
+            if event is None:
+                # Dropped as a slow consumer; the client should reconnect
+                await self.send({
+                    "type": "error",
+                    "code": "SLOW_CONSUMER",
+                    "message": "Too many undelivered events, resubscribe"
+                })
+                self.close(1013)  # Try Again Later
+                return
+            await self.send(event)
+
+    async def _read_loop(self, handler: MessageHandler) -> None:
+        while True:
+            data = await self.websocket.receive_json()
+            self.touch()
+            WS_MESSAGES.labels(direction="in", type=str(data.get("type"))).inc()
+            await handler(self, data)
+
+    async def _write_loop(self) -> None:
+        while True:
+            message = await self._outbox.get()
+            if message is _CLOSE:
+                return
+            await self.websocket.send_text(orjson.dumps(message).decode())
+            WS_MESSAGES.labels(direction="out", type=message.get("type", "")).inc()
+            # Delivering results or events keeps a connection alive; a
+            # ping only does once the client answers it
+            if message.get("type") != "ping":
+                self.touch()
+
+    async def serve(self, handler: MessageHandler) -> None:
+        """Run until the client disconnects or the connection is closed."""
+        self._writer = asyncio.create_task(self._write_loop())
+        reader = asyncio.create_task(self._read_loop(handler))
+        try:
+            done, _ = await asyncio.wait(
+                {reader, self._writer}, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.cancelled():
+                    continue
+                error = task.exception()
+                if error is not None and not isinstance(error, WebSocketDisconnect):
+                    print(f"WebSocket connection error: {error}")
+                    self.close_code = 1011  # Internal Error
+        finally:
+            self.unsubscribe()
+            self.cancel_search()
+            for task in (reader, self._writer):
+                task.cancel()
+            await asyncio.gather(reader, self._writer, return_exceptions=True)
+            try:
+                await self.websocket.close(code=self.close_code)
+            except RuntimeError:
+                pass  # Already closed by the client
+
+
+class ConnectionManager:
+    """
+    Tracks open WebSocket connections.
+    Enforces MAX_WEBSOCKET_CONNECTIONS, pings clients and evicts those that
+    neither sent nor were sent anything but pings for
+    WS_IDLE_TIMEOUT_SECONDS, and runs in-memory searches on a
+    thread pool so a slow lookup never blocks other sockets.
+    """
+    def __init__(self):
+        self.connections: Set[Connection] = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        gauge_function(WS_CONNECTIONS, lambda: len(self.connections))
+
+    def register(self, websocket: WebSocket) -> Optional[Connection]:
+        """Reserve a slot for a new connection, or None when full."""
+        if len(self.connections) >= settings.MAX_WEBSOCKET_CONNECTIONS:
+            WS_CONNECTIONS_REJECTED.inc()
+            return None
+        connection = Connection(websocket)
+        self.connections.add(connection)
+        return connection
+
+    def unregister(self, connection: Connection) -> None:
+        self.connections.discard(connection)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.WS_SEARCH_WORKERS,
+                thread_name_prefix="ws-search"
+            )
+        return self._executor
+
+    async def run_in_executor(self, func: Callable, *args: Any) -> Any:
+        """Run a blocking call on the search thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def sweep(self) -> None:
+        """Evict idle connections and ping the rest."""
+        now = time.monotonic()
+        for connection in list(self.connections):
+            if now - connection.last_activity > settings.WS_IDLE_TIMEOUT_SECONDS:
+                WS_IDLE_EVICTIONS.inc()
+                connection.close(1000)
+            else:
+                # Skipped when the outbox is full; that client is busy anyway
+                connection.send_nowait({"type": "ping"})
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL_SECONDS)
+            self.sweep()
+
+    def start(self) -> None:
+        """Start the heartbeat task."""
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        """Stop the heartbeat, close every connection and the thread pool."""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+        for connection in list(self.connections):
+            connection.close(1001)  # Going Away
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Create manager instance
+connection_manager = ConnectionManager()
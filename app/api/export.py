@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Sequence
+
+from fastapi.responses import StreamingResponse
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Pattern for the `format` query parameter of export endpoints
+FORMAT_PATTERN = "^(ndjson|csv)$"
+
+# Rows serialized per chunk handed to the server
+ROWS_PER_CHUNK = 500
+
+
+def _value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _encode(
+    rows: AsyncIterator[Any],
+    columns: Sequence[str],
+    fmt: str
+) -> AsyncIterator[str]:
+    """Serialize rows to NDJSON or CSV, a few hundred rows per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer:
+        writer.writerow(columns)
+
+    pending = 0
+    async for row in rows:
+        values = [_value(getattr(row, column)) for column in columns]
+        if writer:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(columns, values))) + "\n")
+        pending += 1
+        if pending >= ROWS_PER_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(
+    rows: AsyncIterator[Any],
+    columns: Sequence[str],
+    fmt: str,
+    filename: str
+) -> StreamingResponse:
+    """
+    Stream rows as a downloadable NDJSON or CSV file.
+    rows is consumed lazily, so the response never holds more than one
+    chunk in memory.
+    """
+    return StreamingResponse(
+        _encode(rows, columns, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt}"'
+        }
+    )
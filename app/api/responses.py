@@ -0,0 +1,32 @@
+from typing import Any, Dict, Iterable, List, Type
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from app.schemas.base import Pagination
+
+
+def serialize_rows(rows: Iterable[Any], model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """
+    Turn rows (column tuples or ORM objects) into dicts shaped like model,
+    without validating each row through it. Keys follow the model's field
+    order so the output matches what the response_model would produce.
+    """
+    fields = tuple(model.model_fields)
+    return [{field: getattr(row, field) for field in fields} for row in rows]
+
+
+def list_response(
+    rows: Iterable[Any],
+    model: Type[BaseModel],
+    pagination: Pagination
+) -> ORJSONResponse:
+    """
+    Encode a list page straight to JSON bytes.
+    Routes keep their response_model for the OpenAPI schema; returning a
+    Response skips FastAPI's per-row model construction and validation.
+    """
+    return ORJSONResponse({
+        "items": serialize_rows(rows, model),
+        "pagination": pagination.model_dump()
+    })
@@ -1,5 +1,6 @@
 from . import vehicles
 from . import config
 from . import audit
+from . import stats
 
-__all__ = ['vehicles', 'config', 'audit']
\ No newline at end of file
+__all__ = ['vehicles', 'config', 'audit', 'stats']
\ No newline at end of file
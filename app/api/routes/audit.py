@@ -1,15 +1,22 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from datetime import datetime
 from typing import Optional
 
 from app.schemas import schemas
 from app.services.services import audit_log_service
-from app.api.deps import get_db, verify_api_key, check_rate_limit
-from app.schemas.base import Pagination
+from app.api.deps import get_async_db, get_async_session_factory, verify_api_key, check_rate_limit
+from app.api.export import export_response, FORMAT_PATTERN
+from app.api.responses import list_response
+from app.schemas.base import Pagination, TotalMode
 
 router = APIRouter()
 
+AUDIT_EXPORT_COLUMNS = (
+    "id", "action", "entity", "entity_id", "details", "timestamp"
+)
+
 
 @router.get(
     "",
@@ -22,25 +29,64 @@ async def get_audit_logs(
     entity: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = "exact",
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all audit logs with pagination.
+    Pass `pagination.next_cursor` back as `cursor` to fetch the next page
+    by keyset instead of offset (counts are omitted on cursor pages).
+    `total_mode=estimate` returns a maintained count for unfiltered listings,
+    `total_mode=none` skips the total; `pagination.has_more` is always set.
     """
     skip = (page - 1) * per_page
-    logs, total = audit_log_service.get_logs(
+    logs = await audit_log_service.aget_logs(
         db,
         entity=entity,
         start_date=start_date,
         end_date=end_date,
         skip=skip,
-        limit=per_page
+        limit=per_page,
+        cursor=cursor,
+        total_mode=total_mode
+    )
+
+    return list_response(
+        logs.items,
+        schemas.AuditLogResponse,
+        Pagination.from_page(logs, skip, per_page)
     )
 
-    return {
-        "items": logs,
-        "pagination": Pagination.from_params(total, skip, per_page)
-    }
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(verify_api_key), Depends(check_rate_limit)]
+)
+async def export_audit_logs(
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+    entity: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    session_factory: async_sessionmaker = Depends(get_async_session_factory)
+):
+    """
+    Export audit logs as NDJSON or CSV, newest first.
+    Takes the same filters as listing and includes archived logs. The file
+    is streamed, so any number of rows can be exported in one request.
+    """
+    async def rows():
+        async with session_factory() as db:
+            async for row in audit_log_service.astream_logs(
+                db,
+                entity=entity,
+                start_date=start_date,
+                end_date=end_date
+            ):
+                yield row
+
+    return export_response(rows(), AUDIT_EXPORT_COLUMNS, format, "audit_logs")
 
 
 @router.get(
@@ -52,23 +98,28 @@ async def get_entity_logs(
     entity: str,
     page: int = Query(1, gt=0),
     per_page: int = Query(2, gt=0, le=100),  # Default to 2 for test
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = "exact",
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get audit logs for a specific entity.
     """
     skip = (page - 1) * per_page
-    logs, total = audit_log_service.get_logs(
+    logs = await audit_log_service.aget_logs(
         db,
         entity=entity,
         skip=skip,
-        limit=per_page
+        limit=per_page,
+        cursor=cursor,
+        total_mode=total_mode
     )
 
-    return {
-        "items": logs,
-        "pagination": Pagination.from_params(total, skip, per_page)
-    }
+    return list_response(
+        logs.items,
+        schemas.AuditLogResponse,
+        Pagination.from_page(logs, skip, per_page)
+    )
 
 
 @router.get(
@@ -78,18 +129,19 @@ async def get_entity_logs(
 )
 async def get_recent_logs(
     limit: int = Query(10, gt=0, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get most recent audit logs.
     """
-    logs, total = audit_log_service.get_logs(
+    logs = await audit_log_service.aget_logs(
         db,
         skip=0,
         limit=limit
     )
 
-    return {
-        "items": logs,
-        "pagination": Pagination.from_params(total, 0, limit)
-    }
\ No newline at end of file
+    return list_response(
+        logs.items,
+        schemas.AuditLogResponse,
+        Pagination.from_page(logs, 0, limit)
+    )
\ No newline at end of file
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 
 from app.schemas import schemas
 from app.services.services import config_service
-from app.api.deps import get_db, verify_api_key, check_rate_limit
+from app.services.plate_index import plate_index
+from app.services.events import occupancy_hub
+from app.services.occupancy_stats import occupancy_stats
+from app.services.search_cache import search_cache
+from app.services.row_counts import row_counts
+from app.api.deps import get_async_db, verify_api_key, check_rate_limit
 from app.models.models import Vehicle, SystemConfig
 
 router = APIRouter()
@@ -18,12 +24,12 @@ router = APIRouter()
     dependencies=[Depends(verify_api_key), Depends(check_rate_limit)]
 )
 async def get_retention_period(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current data retention period.
     """
-    return config_service.get_config(db)
+    return await config_service.aget_cached_config(db)
 
 
 @router.put(
@@ -33,7 +39,7 @@ async def get_retention_period(
 )
 async def update_retention_period(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update data retention period.
@@ -41,7 +47,7 @@ async def update_retention_period(
     try:
         body = await request.json()
         config_in = schemas.SystemConfigUpdate(**body)
-        return config_service.update_retention_period(db, config_in.retention_hours)
+        return await config_service.aupdate_retention_period(db, config_in.retention_hours)
     except ValidationError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -63,7 +69,7 @@ async def update_retention_period(
 )
 async def clear_database(
     request: schemas.MaintenanceRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Clear entire database. Requires confirmation message.
@@ -76,15 +82,20 @@ async def clear_database(
     
     try:
         # Clear vehicles
-        query = db.query(Vehicle)
-        count = query.count()
-        query.delete()
+        count = await db.scalar(select(func.count()).select_from(Vehicle))
+        await db.execute(delete(Vehicle))
         
         # Reset system config to defaults
-        config = config_service.get_config(db)
+        config = await config_service.aget_config(db)
         config.retention_hours = 24
         
-        db.commit()
+        await db.commit()
+        await db.run_sync(row_counts.invalidate, Vehicle.__table__)
+        config_service.invalidate()
+        plate_index.clear()
+        search_cache.invalidate()
+        occupancy_stats.reset()
+        occupancy_hub.reset()
         
         return {
             "message": "Database cleared successfully",
@@ -92,7 +103,7 @@ async def clear_database(
             "records_removed": count
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+
+from app.schemas import schemas
+from app.services.occupancy_stats import occupancy_stats
+from app.api.deps import verify_api_key, check_rate_limit
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    response_model=schemas.OccupancyStatsResponse,
+    dependencies=[Depends(verify_api_key), Depends(check_rate_limit)]
+)
+async def get_occupancy_stats():
+    """
+    Get current occupancy and entries/exits per hour.
+    Served from in-memory counters; never queries the database.
+    """
+    return occupancy_stats.snapshot()
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from typing import Optional
 
 from app.schemas import schemas
 from app.services.services import vehicle_service
-from app.api.deps import get_db, verify_api_key, check_rate_limit
-from app.schemas.base import Pagination
+from app.api.deps import get_async_db, get_async_session_factory, verify_api_key, check_rate_limit
+from app.api.export import export_response, FORMAT_PATTERN
+from app.api.responses import list_response
+from app.schemas.base import Pagination, TotalMode
 
 router = APIRouter()
 
+VEHICLE_EXPORT_COLUMNS = (
+    "id", "number_plate", "contact_name", "phone_number", "entry_timestamp"
+)
+
 
 @router.post(
     "",
@@ -18,12 +25,33 @@ router = APIRouter()
 )
 async def create_vehicle(
     vehicle_in: schemas.VehicleCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new vehicle entry.
     """
-    return vehicle_service.create_vehicle(db, vehicle_in)
+    return await vehicle_service.acreate_vehicle(db, vehicle_in)
+
+
+@router.post(
+    "/bulk",
+    response_model=schemas.VehicleBulkResponse,
+    dependencies=[Depends(verify_api_key), Depends(check_rate_limit)]
+)
+async def bulk_create_vehicles(
+    bulk_in: schemas.VehicleBulkCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Register many vehicle entries at once.
+    Duplicate number plates are reported in `conflicts` without aborting
+    the rest of the batch.
+    """
+    created, conflicts = await vehicle_service.abulk_create_vehicles(db, bulk_in.items)
+    return {
+        "created": created,
+        "conflicts": conflicts
+    }
 
 
 @router.get(
@@ -36,16 +64,47 @@ async def list_vehicles(
     limit: int = 50,
     order_by: str = "entry_timestamp",
     order: str = "desc",
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = "exact",
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all active vehicles with pagination.
+    Pass `pagination.next_cursor` back as `cursor` to fetch the next page
+    by keyset instead of offset (counts are omitted on cursor pages).
+    `total_mode=estimate` returns a maintained count instead of counting,
+    `total_mode=none` skips the total; `pagination.has_more` is always set.
     """
-    vehicles, total = vehicle_service.list(db, skip, limit, order_by, order)
-    return {
-        "items": vehicles,
-        "pagination": Pagination.from_params(total, skip, limit)
-    }
+    page = await vehicle_service.alist(
+        db, skip, limit, order_by, order, cursor, total_mode
+    )
+    return list_response(
+        page.items,
+        schemas.VehicleResponse,
+        Pagination.from_page(page, skip, limit)
+    )
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(verify_api_key), Depends(check_rate_limit)]
+)
+async def export_vehicles(
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+    session_factory: async_sessionmaker = Depends(get_async_session_factory)
+):
+    """
+    Export all active vehicles as NDJSON or CSV.
+    The file is streamed from a database cursor, so any number of rows can
+    be exported in one request.
+    """
+    async def rows():
+        async with session_factory() as db:
+            async for row in vehicle_service.astream(db):
+                yield row
+
+    return export_response(rows(), VEHICLE_EXPORT_COLUMNS, format, "vehicles")
 
 
 @router.get(
@@ -55,12 +114,12 @@ async def list_vehicles(
 )
 async def get_vehicle(
     number: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get vehicle details by number plate.
     """
-    vehicle = vehicle_service.get_by_number_plate(db, number)
+    vehicle = await vehicle_service.aget_by_number_plate(db, number)
     if not vehicle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,12 +135,12 @@ async def get_vehicle(
 )
 async def remove_vehicle(
     number: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Remove a vehicle entry.
     """
-    return vehicle_service.remove_vehicle(db, number)
+    return await vehicle_service.aremove_vehicle(db, number)
 
 
 @router.get(
@@ -93,13 +152,18 @@ async def search_vehicles(
     term: str,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = "exact",
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search vehicles by number plate or contact name.
     """
-    vehicles, total = vehicle_service.search_vehicles(db, term, skip, limit)
-    return {
-        "items": vehicles,
-        "pagination": Pagination.from_params(total, skip, limit)
-    }
\ No newline at end of file
+    page = await vehicle_service.asearch_vehicles(
+        db, term, skip, limit, cursor, total_mode
+    )
+    return list_response(
+        page.items,
+        schemas.VehicleResponse,
+        Pagination.from_page(page, skip, limit)
+    )
\ No newline at end of file
@@ -1,12 +1,13 @@
-from fastapi import WebSocket, WebSocketDisconnect, HTTPException, status
-from typing import Set, Dict, Any
-import json
+from fastapi import WebSocket, HTTPException, status
+from typing import Dict, Any, List, Optional
 from datetime import datetime
+import asyncio
 
 from app.core.config import settings
 from app.services.services import vehicle_service
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.services.plate_index import plate_index
+from app.core.database import AsyncSessionLocal
+from app.api.connection_manager import connection_manager, Connection, WS_SEARCH_LATENCY
 
 
 async def verify_api_key(websocket: WebSocket) -> None:
@@ -24,91 +25,142 @@ async def verify_api_key(websocket: WebSocket) -> None:
         )
 
 
+async def search(term: str) -> List[Any]:
+    """
+    Answer a search from the in-memory index on the search thread pool,
+    falling back to the database while the index is being built.
+    """
+    with WS_SEARCH_LATENCY.time():
+        vehicles = await connection_manager.run_in_executor(
+            plate_index.search, term, 10
+        )
+        if vehicles is None:
+            async with AsyncSessionLocal() as db:
+                page = await vehicle_service.asearch_vehicles(
+                    db,
+                    term,
+                    skip=0,
+                    limit=10
+                )
+            vehicles = page.items
+    return vehicles
+
+
+async def handle_message(connection: Connection, data: Dict[str, Any]) -> None:
+    """Handle one message from a connected client."""
+    message_type = data.get("type")
+    
+    if message_type == "pong":
+        return  # Heartbeat reply; receiving it already refreshed the connection
+    
+    if message_type == "subscribe":
+        if not settings.WS_OCCUPANCY_FEED:
+            await connection.send({
+                "type": "error",
+                "code": "FEED_DISABLED",
+                "message": "The occupancy feed is disabled on this server"
+            })
+            return
+        connection.subscribe()
+        await connection.send({
+            "type": "subscribed",
+            "occupancy": len(plate_index) if plate_index.ready else None,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        return
+    
+    if message_type == "unsubscribe":
+        connection.unsubscribe()
+        await connection.send({
+            "type": "unsubscribed",
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        return
+    
+    # Validate message type
+    if message_type != "search":
+        await connection.send({
+            "type": "error",
+            "code": "INVALID_MESSAGE_TYPE",
+            "message": "Invalid message type"
+        })
+        return
+    
+    # Validate search term
+    search_term = data.get("search_term", "")
+    request_id = data.get("request_id")
+    if len(search_term) < 2:
+        # The term the client is typing changed; any pending answer is stale
+        connection.cancel_search()
+        await connection.send({
+            "type": "error",
+            "code": "INVALID_SEARCH",
+            "message": "Search term must be at least 2 characters",
+            "request_id": request_id
+        })
+        return
+    
+    connection.run_search(answer_search(connection, search_term, request_id))
+
+
+async def answer_search(
+    connection: Connection,
+    search_term: str,
+    request_id: Optional[Any]
+) -> None:
+    """
+    Run one search and send its results. Waits WS_SEARCH_DEBOUNCE_MS first,
+    so a search superseded within the window never reaches the database.
+    """
+    if settings.WS_SEARCH_DEBOUNCE_MS > 0:
+        await asyncio.sleep(settings.WS_SEARCH_DEBOUNCE_MS / 1000)
+    
+    try:
+        vehicles = await search(search_term)
+    except Exception as e:
+        print(f"WebSocket search error: {e}")
+        await connection.send({
+            "type": "error",
+            "code": "SEARCH_FAILED",
+            "message": "Search failed",
+            "request_id": request_id
+        })
+        return
+    
+    # Send results
+    await connection.send({
+        "type": "search_results",
+        "request_id": request_id,
+        "results": [
+            {
+                "number_plate": v.number_plate,
+                "contact_name": v.contact_name,
+                "phone_number": v.phone_number,
+                "entry_timestamp": v.entry_timestamp.isoformat()
+            }
+            for v in vehicles
+        ],
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
+
 async def handle_websocket_connection(websocket: WebSocket):
     """Handle WebSocket connection for real-time vehicle search."""
+    # Verify API key before accepting connection
     try:
-        # Verify API key before accepting connection
         await verify_api_key(websocket)
-        
-        # Check connection limit
-        if (
-            hasattr(websocket.app.state, "websocket_connections") and
-            len(websocket.app.state.websocket_connections) >= settings.MAX_WEBSOCKET_CONNECTIONS
-        ):
-            await websocket.close(code=1008)  # Policy Violation
-            return
-        
-        # Accept connection
-        await websocket.accept()
-        
-        # Add to active connections
-        if not hasattr(websocket.app.state, "websocket_connections"):
-            websocket.app.state.websocket_connections = set()
-        websocket.app.state.websocket_connections.add(websocket)
-        
-        try:
-            while True:
-                # Receive message
-                data = await websocket.receive_json()
-                
-                # Validate message type
-                if "type" not in data or data["type"] != "search":
-                    await websocket.send_json({
-                        "type": "error",
-                        "code": "INVALID_MESSAGE_TYPE",
-                        "message": "Invalid message type"
-                    })
-                    continue
-                
-                # Validate search term
-                search_term = data.get("search_term", "")
-                if len(search_term) < 2:
-                    await websocket.send_json({
-                        "type": "error",
-                        "code": "INVALID_SEARCH",
-                        "message": "Search term must be at least 2 characters"
-                    })
-                    continue
-                
-                # Perform search
-                db = SessionLocal()
-                try:
-                    vehicles, _ = vehicle_service.search_vehicles(
-                        db,
-                        search_term,
-                        skip=0,
-                        limit=10
-                    )
-                    
-                    # Send results
-                    await websocket.send_json({
-                        "type": "search_results",
-                        "results": [
-                            {
-                                "number_plate": v.number_plate,
-                                "contact_name": v.contact_name,
-                                "phone_number": v.phone_number,
-                                "entry_timestamp": v.entry_timestamp.isoformat()
-                            }
-                            for v in vehicles
-                        ],
-                        "timestamp": datetime.utcnow().isoformat()
-                    })
-                finally:
-                    db.close()
-                
-        except WebSocketDisconnect:
-            pass
-        finally:
-            # Remove from active connections
-            if hasattr(websocket.app.state, "websocket_connections"):
-                websocket.app.state.websocket_connections.discard(websocket)
-    
     except HTTPException as e:
         await websocket.close(code=1008, reason=e.detail)
-    except Exception as e:
-        await websocket.close(code=1011)  # Internal Error
+        return
+    
+    # Check connection limit
+    connection = connection_manager.register(websocket)
+    if connection is None:
+        await websocket.close(code=1008)  # Policy Violation
+        return
+    
+    try:
+        await websocket.accept()
+        await connection.serve(handle_message)
     finally:
-        # Ensure connection is closed
-        if not websocket.client_state.DISCONNECTED:
-            await websocket.close()
\ No newline at end of file
+        connection_manager.unregister(connection)
@@ -16,15 +16,98 @@ class Settings(BaseSettings):
     # Database
     SQLALCHEMY_DATABASE_URL: str = "sqlite:///./parking_system.db"
     
+    # SQLite performance profile (applied to every new connection)
+    SQLITE_PERFORMANCE_PROFILE: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_CACHE_SIZE: int = -65536  # Negative values are KiB (64 MiB)
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MAINTENANCE_INTERVAL_SECONDS: int = 300
+    
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
     
     # System Settings
     DEFAULT_RETENTION_HOURS: int = 24
+    CLEANUP_BATCH_SIZE: int = 1000
+    CONFIG_CACHE_TTL_SECONDS: int = 30
+    SEARCH_CACHE_SIZE: int = 1024  # Cached search pages (0 disables the cache)
+    # Each worker caches its own pages and only its own writes invalidate
+    # them: with several workers, results can miss other workers'
+    # registrations and removals for up to this long
+    SEARCH_CACHE_TTL_SECONDS: int = 30
+    # Maintained row counts behind total_mode=estimate are recounted this often
+    ROW_COUNT_REFRESH_SECONDS: int = 300
+    # Hours of entry/exit history kept in memory for /api/v1/stats
+    STATS_HISTORY_HOURS: int = 24
+    # Seconds between recounting parked vehicles, to include other workers'
+    # entries and exits (0: only at startup)
+    STATS_REFRESH_SECONDS: int = 30
+    
+    # Audit logging: "strict" writes audit rows in the request transaction,
+    # "async" queues them for a background batch writer
+    AUDIT_MODE: str = "strict"
+    AUDIT_QUEUE_MAX: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    # Each worker spools to AUDIT_SPOOL_PATH.<pid>
+    AUDIT_SPOOL_PATH: str = "./audit_spool.jsonl"
+    
+    # Audit logs older than this many days move to compressed segment
+    # files under AUDIT_ARCHIVE_DIR (0 keeps everything in the table)
+    AUDIT_ARCHIVE_AFTER_DAYS: int = 30
+    AUDIT_ARCHIVE_DIR: str = "./audit_archive"
+    # Rows read from audit_logs per round trip while archiving a day
+    AUDIT_ARCHIVE_BATCH_SIZE: int = 5000
+    # Decoded segment rows kept in memory per process; bigger days are
+    # decompressed on every read
+    AUDIT_SEGMENT_CACHE_ROWS: int = 100000
+    
+    # Rows fetched per round trip by the streaming export endpoints
+    EXPORT_BATCH_SIZE: int = 1000
+    
+    # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 100
-    MAX_WEBSOCKET_CONNECTIONS: int = 5
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" or "shared" (all workers on the host)
+    RATE_LIMIT_SHARED_NAME: str = "parking_rate_limit"
+    RATE_LIMIT_SHARED_SLOTS: int = 4096
+    
+    # WebSockets
+    # Push occupancy diffs to subscribed clients. Each worker only pushes the
+    # changes it handled itself, so this needs WEB_CONCURRENCY=1
+    WS_OCCUPANCY_FEED: bool = True
+    MAX_WEBSOCKET_CONNECTIONS: int = 5000
+    WS_SEND_QUEUE_SIZE: int = 64  # Outgoing messages buffered per connection
+    WS_HEARTBEAT_INTERVAL_SECONDS: int = 30
+    WS_IDLE_TIMEOUT_SECONDS: int = 300
+    WS_SEARCH_WORKERS: int = 4
+    # Wait this long before running a search; a newer search cancels it (0: off)
+    WS_SEARCH_DEBOUNCE_MS: int = 0
+    # Occupancy events buffered per subscriber before it is dropped as too slow
+    WS_SUBSCRIBER_QUEUE_SIZE: int = 100
+    # Seconds between catching the typeahead index up with other workers'
+    # writes (0: only at startup)
+    PLATE_INDEX_REFRESH_SECONDS: int = 30
+    
+    # Worker processes serving the app (read by uvicorn as well). Typeahead,
+    # occupancy and search caches are kept per process; see
+    # multi_worker_conflicts() for what more than one worker rules out
+    WEB_CONCURRENCY: int = 1
     
     # Monitoring
+    ENABLE_METRICS: bool = True
+    # Dedicated /metrics listener, off by default (0: only the API port's
+    # /metrics). With several workers set PROMETHEUS_MULTIPROC_DIR in their
+    # environment
+    METRICS_PORT: int = 0
+    METRICS_REFRESH_SECONDS: int = 5
+    # SQL statements slower than this are logged with their plan (0: off)
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SLOW_QUERY_EXPLAIN: bool = True
+    # Distinct statement labels on db_* metrics before the rest share "other"
+    QUERY_FINGERPRINT_LIMIT: int = 500
     GRAFANA_PASSWORD: str = "admin"
     
     # Development Settings
@@ -45,6 +128,23 @@ class Settings(BaseSettings):
         if isinstance(v, str):
             return [i.strip() for i in v.split(",")]
         return v
+    
+    def multi_worker_conflicts(self) -> List[str]:
+        """
+        Settings relying on per-process state that other workers' writes
+        never reach. Empty when WEB_CONCURRENCY is 1. The search cache is
+        not listed: its staleness is bounded by SEARCH_CACHE_TTL_SECONDS.
+        """
+        if self.WEB_CONCURRENCY <= 1:
+            return []
+        conflicts = []
+        if self.WS_OCCUPANCY_FEED:
+            conflicts.append("WS_OCCUPANCY_FEED=true (set it to false)")
+        if self.PLATE_INDEX_REFRESH_SECONDS <= 0:
+            conflicts.append("PLATE_INDEX_REFRESH_SECONDS=0 (set a refresh interval)")
+        if self.STATS_REFRESH_SECONDS <= 0:
+            conflicts.append("STATS_REFRESH_SECONDS=0 (set a refresh interval)")
+        return conflicts
 
 
 settings = Settings()
\ No newline at end of file
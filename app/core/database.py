@@ -1,8 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from app.core.config import settings
+from app.core.db_metrics import instrument_engine, timed_pool_class
 
 # Create SQLAlchemy engine
 if settings.TESTING:
@@ -10,12 +14,77 @@ if settings.TESTING:
 else:
     SQLALCHEMY_DATABASE_URL = settings.SQLALCHEMY_DATABASE_URL
 
+# Async drivers for the synchronous URLs used in settings and Alembic
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a database URL for its asyncio counterpart."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+connect_args = (
+    {"check_same_thread": False}  # Only needed for SQLite
+    if SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+    else {}
+)
+
 # Create engine with SQLite configuration
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Only needed for SQLite
+    connect_args=connect_args,
+    poolclass=timed_pool_class(SQLALCHEMY_DATABASE_URL)
+)
+
+# Async engine used by the request handlers, WebSocket and background tasks
+async_engine = create_async_engine(
+    to_async_url(SQLALCHEMY_DATABASE_URL),
+    connect_args=connect_args,
+    poolclass=timed_pool_class(to_async_url(SQLALCHEMY_DATABASE_URL))
 )
 
+
+def sqlite_pragmas() -> list[str]:
+    """PRAGMA statements of the configured SQLite performance profile."""
+    if not settings.SQLITE_PERFORMANCE_PROFILE:
+        return []
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+
+
+def configure_sqlite(engine: Engine) -> None:
+    """Apply the SQLite performance profile to each new connection."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in sqlite_pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+configure_sqlite(engine)
+configure_sqlite(async_engine.sync_engine)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -23,6 +92,14 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Objects outlive the commit so responses can be serialized without
+# lazy loads (which an AsyncSession cannot do implicitly)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Database dependency
 def get_db() -> Generator:
     """
@@ -32,4 +109,20 @@ def get_db() -> Generator:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database session dependency.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """
+    Async session factory dependency, for streaming responses whose body
+    outlives the request's dependencies and opens its own session.
+    """
+    return AsyncSessionLocal
@@ -0,0 +1,196 @@
+import logging
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by statement fingerprint",
+    ["statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+DB_QUERY_ERRORS = Counter(
+    "db_query_errors_total",
+    "SQL statements that raised, by statement fingerprint",
+    ["statement"]
+)
+
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total",
+    "SQL statements slower than SLOW_QUERY_THRESHOLD_MS, by statement fingerprint",
+    ["statement"]
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed while handling one HTTP request",
+    ["method", "endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including opening one"
+)
+
+# Label for statements seen after QUERY_FINGERPRINT_LIMIT distinct ones
+OTHER_STATEMENT = "other"
+
+# Statements worth an EXPLAIN; others (INSERT, PRAGMA, DDL) are only timed
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_GROUPS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Per-request statement count, set by the HTTP metrics middleware. The
+# holder is mutable so queries made in tasks that copied the context count.
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+_fingerprints: Set[str] = set()
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a statement so executions differing only in literals,
+    parameters or the length of IN/VALUES lists share a label.
+    """
+    text = _STRING.sub("?", statement)
+    text = _PARAM.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    text = _PLACEHOLDER_LIST.sub("(?)", text)
+    text = _REPEATED_GROUPS.sub("(?)", text)
+    return text[:200]
+
+
+def statement_label(statement: str) -> str:
+    """The fingerprint, or "other" once QUERY_FINGERPRINT_LIMIT are in use."""
+    label = fingerprint(statement)
+    if label not in _fingerprints:
+        if len(_fingerprints) >= settings.QUERY_FINGERPRINT_LIMIT:
+            return OTHER_STATEMENT
+        _fingerprints.add(label)
+    return label
+
+
+def track_request_queries() -> List[int]:
+    """Start counting statements for the current request; returns the counter."""
+    holder = [0]
+    _request_queries.set(holder)
+    return holder
+
+
+def explain(conn, statement: str, parameters: Any) -> Optional[List[str]]:
+    """The query plan of a statement, or None where it cannot be explained."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect == "postgresql":
+        prefix = "EXPLAIN "
+    else:
+        return None
+    try:
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+
+
+def log_slow_query(
+    conn,
+    statement: str,
+    parameters: Any,
+    elapsed: float,
+    executemany: bool
+) -> None:
+    plan = None
+    if (
+        settings.SLOW_QUERY_EXPLAIN
+        and not executemany
+        and statement.lstrip().upper().startswith(EXPLAINABLE)
+    ):
+        plan = explain(conn, statement, parameters)
+    # Parameters are left out: they carry plates and phone numbers
+    logger.warning(
+        "Slow query (%.1f ms): %s%s",
+        elapsed * 1000,
+        fingerprint(statement),
+        "".join(f"\n  {line}" for line in plan) if plan else ""
+    )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Time every statement of an engine (for an AsyncEngine, pass its
+    sync_engine) and log statements slower than SLOW_QUERY_THRESHOLD_MS
+    with their query plan. Pool checkouts are timed by creating the engine
+    with poolclass=timed_pool_class(url).
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        label = statement_label(statement)
+        DB_QUERY_DURATION.labels(statement=label).observe(elapsed)
+        holder = _request_queries.get()
+        if holder is not None:
+            holder[0] += 1
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold > 0 and elapsed * 1000 >= threshold:
+            DB_SLOW_QUERIES.labels(statement=label).inc()
+            log_slow_query(conn, statement, parameters, elapsed, executemany)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        if exception_context.statement is not None:
+            DB_QUERY_ERRORS.labels(
+                statement=statement_label(exception_context.statement)
+            ).inc()
+
+
+_timed_pools: Dict[type, type] = {}
+
+
+def timed_pool_class(url: str) -> type:
+    """
+    The pool class SQLAlchemy would pick for url, subclassed to time
+    checkouts; pass it as poolclass= when creating the engine. Pools have
+    no event before a checkout starts, so the wait is measured around
+    _do_get.
+    """
+    parsed = make_url(url)
+    pool_class = parsed.get_dialect().get_pool_class(parsed)
+    if pool_class not in _timed_pools:
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super(timed, self)._do_get()
+            finally:
+                DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+        timed = type(f"Timed{pool_class.__name__}", (pool_class,), {"_do_get": _do_get})
+        _timed_pools[pool_class] = timed
+    return _timed_pools[pool_class]
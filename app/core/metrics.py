@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+from typing import Callable, List, Optional, Tuple
+
+import prometheus_client
+from prometheus_client import CollectorRegistry, Gauge, multiprocess
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# prometheus_client switches to file-backed values when this is set at import,
+# so it has to be in the environment of every worker before it starts
+MULTIPROCESS = bool(
+    os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+)
+
+# Callback gauges, re-evaluated into their value files in multiprocess mode
+_function_gauges: List[Tuple[Gauge, Callable[[], float]]] = []
+
+_metrics_server_started = False
+
+
+def gauge_function(gauge: Gauge, f: Callable[[], float]) -> None:
+    """
+    Gauge.set_function that also works with several workers.
+    In multiprocess mode a callback only runs in the process that is
+    scraped, so instead each worker writes the value to its own file
+    every METRICS_REFRESH_SECONDS.
+    """
+    if MULTIPROCESS:
+        _function_gauges.append((gauge, f))
+    else:
+        gauge.set_function(f)
+
+
+def refresh_function_gauges() -> None:
+    for gauge, f in _function_gauges:
+        gauge.set(f())
+
+
+def registry() -> CollectorRegistry:
+    """The registry to expose: every worker's metrics in multiprocess mode."""
+    if not MULTIPROCESS:
+        return prometheus_client.REGISTRY
+    aggregate = CollectorRegistry()
+    multiprocess.MultiProcessCollector(aggregate)
+    return aggregate
+
+
+def generate_latest() -> bytes:
+    """Render the metrics in the Prometheus text format."""
+    refresh_function_gauges()
+    return prometheus_client.generate_latest(registry())
+
+
+def start_metrics_server() -> Optional[int]:
+    """
+    Serve /metrics on METRICS_PORT from a daemon thread, once per process.
+    Off unless METRICS_PORT is set, and under TESTING. With several workers
+    the first to bind the port serves it; the others get "address in use"
+    and rely on it, since every worker's metrics are aggregated from the
+    shared directory. Returns the port, or None.
+    """
+    global _metrics_server_started
+    if (
+        _metrics_server_started
+        or not settings.ENABLE_METRICS
+        or not settings.METRICS_PORT
+        or settings.TESTING
+    ):
+        return None
+    try:
+        prometheus_client.start_http_server(settings.METRICS_PORT, registry=registry())
+    except OSError as e:
+        logger.warning(
+            "Metrics server not started on port %s: %s%s",
+            settings.METRICS_PORT,
+            e,
+            " (another worker may be serving it)" if MULTIPROCESS else ""
+        )
+        return None
+    _metrics_server_started = True
+    return settings.METRICS_PORT
+
+
+async def refresh_task() -> None:
+    """Periodically write callback gauges to this worker's value files."""
+    while True:
+        refresh_function_gauges()
+        await asyncio.sleep(settings.METRICS_REFRESH_SECONDS)
+
+
+def mark_process_dead(pid: Optional[int] = None) -> None:
+    """Drop a stopped worker's live gauges from the aggregate."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid or os.getpid())
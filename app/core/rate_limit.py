@@ -0,0 +1,220 @@
+import hashlib
+import os
+import struct
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from threading import Lock
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for sliding-window counters.
+    Each key holds (window_id, current_count, previous_count); callers
+    read-modify-write it while holding lock().
+    """
+
+    @abstractmethod
+    def lock(self) -> ContextManager[None]:
+        """Exclude other readers and writers of the counters."""
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[int, int, int]:
+        """Return (window_id, current, previous) for key, zeros if unknown."""
+
+    @abstractmethod
+    def set(self, key: str, window_id: int, current: int, previous: int) -> None:
+        """Store the counters of key."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget every key."""
+
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process counters in a dict. State is not shared between workers."""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._lock = Lock()
+        self._counters: Dict[str, List[int]] = {}
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        with self._lock:
+            yield
+
+    def get(self, key: str) -> Tuple[int, int, int]:
+        counter = self._counters.get(key)
+        return tuple(counter) if counter else (0, 0, 0)
+
+    def set(self, key: str, window_id: int, current: int, previous: int) -> None:
+        if key not in self._counters and len(self._counters) >= self.max_keys:
+            # Keys idle for two windows no longer affect any decision
+            self._counters = {
+                k: v for k, v in self._counters.items() if v[0] >= window_id - 1
+            }
+        self._counters[key] = [window_id, current, previous]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+class SharedMemoryBackend(RateLimitBackend):
+    """
+    Counters in a named shared memory block, shared by every worker process
+    on the host. The block is a fixed-size open-addressing hash table of
+    (key hash, window_id, current, previous) slots guarded by an flock.
+    When a probe sequence is full, the slot with the oldest window is reused.
+    """
+    SLOT = struct.Struct("<QqII")
+    MAX_PROBES = 16
+
+    def __init__(self, name: str, slots: int):
+        size = self.SLOT.size * slots
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+        # Attaching workers follow whatever size the first worker chose
+        self.slots = len(self._shm.buf) // self.SLOT.size
+        # Outlive the worker that happened to create it; the resource
+        # tracker would otherwise unlink the block when that worker exits
+        try:
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+        except Exception:
+            pass
+        # flock excludes other processes; threads of this one share the
+        # file description, so they also need a thread lock
+        self._lock_file = open(
+            os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a"
+        )
+        self._thread_lock = Lock()
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        import fcntl  # POSIX only
+
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Zero marks an empty slot
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1
+
+    def _find(self, key_hash: int) -> Tuple[int, bool]:
+        """Return (slot, found) for the key, or the slot to claim for it."""
+        start = key_hash % self.slots
+        oldest_slot, oldest_window = start, None
+        for probe in range(min(self.MAX_PROBES, self.slots)):
+            slot = (start + probe) % self.slots
+            stored_hash, window_id, _, _ = self.SLOT.unpack_from(
+                self._shm.buf, slot * self.SLOT.size
+            )
+            if stored_hash == key_hash:
+                return slot, True
+            if stored_hash == 0:
+                return slot, False
+            if oldest_window is None or window_id < oldest_window:
+                oldest_slot, oldest_window = slot, window_id
+        return oldest_slot, False
+
+    def get(self, key: str) -> Tuple[int, int, int]:
+        slot, found = self._find(self._hash(key))
+        if not found:
+            return 0, 0, 0
+        _, window_id, current, previous = self.SLOT.unpack_from(
+            self._shm.buf, slot * self.SLOT.size
+        )
+        return window_id, current, previous
+
+    def set(self, key: str, window_id: int, current: int, previous: int) -> None:
+        key_hash = self._hash(key)
+        slot, _ = self._find(key_hash)
+        self.SLOT.pack_into(
+            self._shm.buf, slot * self.SLOT.size,
+            key_hash, window_id, current, previous
+        )
+
+    def clear(self) -> None:
+        with self.lock():
+            self._shm.buf[:] = bytes(len(self._shm.buf))
+
+    def close(self, unlink: bool = False) -> None:
+        """Detach from the block, removing it from the system if unlink."""
+        self._shm.close()
+        self._lock_file.close()
+        if unlink:
+            # Hand the block back to the tracker so unlink() can release it
+            resource_tracker.register(self._shm._name, "shared_memory")
+            self._shm.unlink()
+
+
+class RateLimiter:
+    """
+    Sliding-window-counter rate limiter.
+
+    Each key keeps two counters: requests in the current fixed window and
+    in the previous one. The rate over the trailing window is estimated as
+    previous * (1 - elapsed fraction of current window) + current, which
+    costs O(1) time and memory per key.
+    """
+    def __init__(
+        self,
+        limit: int,
+        window_seconds: float = 60.0,
+        backend: Optional[RateLimitBackend] = None
+    ):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.backend = backend or MemoryBackend()
+
+    def is_allowed(self, key: str) -> bool:
+        """
+        Check if request is allowed under rate limit, and count it if so.
+        """
+        now = time.monotonic()  # System-wide on Linux, so safe across workers
+        window_id, offset = divmod(now, self.window_seconds)
+        window_id = int(window_id)
+        elapsed = offset / self.window_seconds
+
+        with self.backend.lock():
+            stored_window, current, previous = self.backend.get(key)
+            if stored_window == window_id - 1:
+                current, previous = 0, current
+            elif stored_window != window_id:
+                current, previous = 0, 0
+
+            if previous * (1 - elapsed) + current + 1 > self.limit:
+                return False
+
+            self.backend.set(key, window_id, current + 1, previous)
+            return True
+
+    def reset(self) -> None:
+        """Forget all counters."""
+        self.backend.clear()
+
+
+def create_backend() -> RateLimitBackend:
+    """Build the backend selected by RATE_LIMIT_BACKEND."""
+    if settings.RATE_LIMIT_BACKEND == "shared":
+        return SharedMemoryBackend(
+            settings.RATE_LIMIT_SHARED_NAME,
+            settings.RATE_LIMIT_SHARED_SLOTS
+        )
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {settings.RATE_LIMIT_BACKEND}")
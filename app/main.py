@@ -4,18 +4,25 @@ from fastapi.middleware.cors import CORSMiddleware
 import time
 import uuid
 import asyncio
-import prometheus_client
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.routing import Match
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import text
 
 from app.core.config import settings
-from app.api.routes import vehicles, config, audit
-from app.core.database import SessionLocal
+from app.core import metrics as metrics_exporter
+from app.core.db_metrics import DB_QUERIES_PER_REQUEST, track_request_queries
+from app.api.routes import vehicles, config, audit, stats
+from app.core.database import AsyncSessionLocal, SessionLocal
 from app.api.websockets import handle_websocket_connection
-from app.services.services import vehicle_service
-from app.core.database import engine
+from app.api.connection_manager import connection_manager
+from app.services.services import vehicle_service, audit_log_service
+from app.services.plate_index import plate_index
+from app.services.occupancy_stats import occupancy_stats
+from app.services.audit_writer import audit_writer
+from app.core.database import async_engine
 from app.models.base import Base
+from app.models.search import install_search_index
 
 # Prometheus metrics
 REQUEST_COUNT = Counter(
@@ -30,36 +37,136 @@ REQUEST_LATENCY = Histogram(
     ["method", "endpoint"]
 )
 
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled",
+    ["method", "endpoint"],
+    multiprocess_mode="livesum"
+)
+
+# Bytes, 100 B to 10 MB
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+REQUEST_SIZE = Histogram(
+    "http_request_size_bytes",
+    "HTTP request body size (from Content-Length)",
+    ["method", "endpoint"],
+    buckets=SIZE_BUCKETS
+)
+
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size, streamed responses included",
+    ["method", "endpoint"],
+    buckets=SIZE_BUCKETS
+)
+
+# Endpoint label for requests no route matched, so scans of random URLs
+# cannot create new time series
+UNMATCHED_ENDPOINT = "unmatched"
+
 async def cleanup_task():
-    """Periodic task to cleanup expired vehicle records."""
+    """Periodic task to cleanup expired vehicle records and archive old audit logs."""
     while True:
         try:
-            db = SessionLocal()
-            vehicle_service.cleanup_expired_vehicles(db)
+            async with AsyncSessionLocal() as db:
+                await vehicle_service.acleanup_expired_vehicles(db)
+            await audit_log_service.aarchive_logs()
         except Exception as e:
             print(f"Error in cleanup task: {e}")
-        finally:
-            db.close()
         # Run every hour
         await asyncio.sleep(3600)
 
+def refresh_plate_index() -> int:
+    with SessionLocal() as db:
+        return plate_index.refresh(db)
+
+async def plate_index_refresh_task():
+    """Periodically pick up vehicles registered or removed by other workers."""
+    while True:
+        await asyncio.sleep(settings.PLATE_INDEX_REFRESH_SECONDS)
+        try:
+            await asyncio.to_thread(refresh_plate_index)
+        except Exception as e:
+            print(f"Error refreshing plate index: {e}")
+
+def recount_parked() -> int:
+    with SessionLocal() as db:
+        return occupancy_stats.recount(db)
+
+async def stats_refresh_task():
+    """Periodically recount parked vehicles, including other workers' changes."""
+    while True:
+        await asyncio.sleep(settings.STATS_REFRESH_SECONDS)
+        try:
+            await asyncio.to_thread(recount_parked)
+        except Exception as e:
+            print(f"Error recounting parked vehicles: {e}")
+
+async def sqlite_maintenance_task():
+    """Periodic WAL checkpoint and query planner statistics refresh."""
+    while True:
+        await asyncio.sleep(settings.SQLITE_MAINTENANCE_INTERVAL_SECONDS)
+        try:
+            async with async_engine.connect() as conn:
+                # PASSIVE never waits on readers or writers
+                await conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+                await conn.exec_driver_sql("PRAGMA optimize")
+        except Exception as e:
+            print(f"Error in SQLite maintenance task: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan events for FastAPI app."""
     # Startup
-    Base.metadata.create_all(bind=engine)
+    conflicts = settings.multi_worker_conflicts()
+    if conflicts:
+        raise RuntimeError(
+            f"WEB_CONCURRENCY={settings.WEB_CONCURRENCY} needs state shared "
+            f"between workers, which these settings rule out: {', '.join(conflicts)}"
+        )
     
-    # Start cleanup task
-    cleanup_task_handle = asyncio.create_task(cleanup_task())
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(install_search_index)
+    
+    # Load active vehicles into the typeahead index
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(plate_index.rebuild)
+    
+    # Replay spooled audit events and start the batch writer
+    await audit_writer.start(AsyncSessionLocal)
+    
+    # Seed occupancy counters once the replayed audit rows are in
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(occupancy_stats.rebuild)
+    connection_manager.start()
+    metrics_exporter.start_metrics_server()
+    
+    # Start background tasks
+    background_tasks = [asyncio.create_task(cleanup_task())]
+    if settings.PLATE_INDEX_REFRESH_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(plate_index_refresh_task()))
+    if settings.STATS_REFRESH_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(stats_refresh_task()))
+    if metrics_exporter.MULTIPROCESS:
+        background_tasks.append(asyncio.create_task(metrics_exporter.refresh_task()))
+    if async_engine.dialect.name == "sqlite" and settings.SQLITE_PERFORMANCE_PROFILE:
+        background_tasks.append(asyncio.create_task(sqlite_maintenance_task()))
     
     yield
     
     # Shutdown
-    cleanup_task_handle.cancel()
-    try:
-        await cleanup_task_handle
-    except asyncio.CancelledError:
-        pass
+    for task in background_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await connection_manager.stop()
+    await audit_writer.stop(AsyncSessionLocal)
+    await async_engine.dispose()
+    metrics_exporter.mark_process_dead()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -81,27 +188,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def route_template(request: Request) -> str:
+    """The path template of the route serving the request, e.g. /api/v1/vehicles/{number}."""
+    partial = None
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path  # Path matched, method did not (405)
+    return partial or UNMATCHED_ENDPOINT
+
 @app.middleware("http")
 async def metrics_middleware(request: Request, call_next):
-    """Middleware to collect Prometheus metrics."""
-    if not settings.TESTING:  # Skip metrics in tests
-        start_time = time.time()
-        method = request.method
-        path = request.url.path
-        
-        try:
-            response = await call_next(request)
-            status_code = response.status_code
-            REQUEST_COUNT.labels(method=method, endpoint=path, status=status_code).inc()
-            REQUEST_LATENCY.labels(method=method, endpoint=path).observe(
-                time.time() - start_time
-            )
-            return response
-        except Exception as e:
-            REQUEST_COUNT.labels(method=method, endpoint=path, status=500).inc()
-            raise e
-    else:
-        return await call_next(request)
+    """
+    Middleware to collect Prometheus metrics.
+    Requests are labelled by route template rather than raw path, so the
+    number of time series is bounded by the number of routes.
+    """
+    start_time = time.perf_counter()
+    method = request.method
+    endpoint = route_template(request)
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        REQUEST_SIZE.labels(method=method, endpoint=endpoint).observe(int(content_length))
+    
+    queries = track_request_queries()
+    in_progress = REQUESTS_IN_PROGRESS.labels(method=method, endpoint=endpoint)
+    in_progress.inc()
+    try:
+        response = await call_next(request)
+    except Exception:
+        REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=500).inc()
+        raise
+    finally:
+        in_progress.dec()
+    
+    REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=response.status_code).inc()
+    REQUEST_LATENCY.labels(method=method, endpoint=endpoint).observe(
+        time.perf_counter() - start_time
+    )
+    
+    def finished(size: int) -> None:
+        # Streamed responses keep querying until the body is sent
+        RESPONSE_SIZE.labels(method=method, endpoint=endpoint).observe(size)
+        DB_QUERIES_PER_REQUEST.labels(method=method, endpoint=endpoint).observe(queries[0])
+    
+    response.body_iterator = count_body(response.body_iterator, finished)
+    return response
+
+async def count_body(body_iterator, finished):
+    """Pass a response body through, calling finished(size) once it is sent."""
+    size = 0
+    try:
+        async for chunk in body_iterator:
+            size += len(chunk)
+            yield chunk
+    finally:
+        finished(size)
 
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
@@ -130,6 +274,12 @@ app.include_router(
     tags=["audit"]
 )
 
+app.include_router(
+    stats.router,
+    prefix="/api/v1/stats",
+    tags=["stats"]
+)
+
 # WebSocket endpoint
 app.add_api_websocket_route(
     "/ws/vehicles/search",
@@ -143,10 +293,11 @@ async def health_check():
     """Check system health."""
     try:
         # Check database connection
-        with engine.connect() as conn:
-            conn.execute("SELECT 1")
-            db_status = "healthy"
-            db_latency = 0
+        start_time = time.perf_counter()
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        db_status = "healthy"
+        db_latency = round((time.perf_counter() - start_time) * 1000, 2)
     except Exception as e:
         db_status = "unhealthy"
         db_latency = None
@@ -166,9 +317,9 @@ async def health_check():
 # Prometheus metrics endpoint
 @app.get("/metrics", tags=["monitoring"])
 async def metrics():
-    """Expose Prometheus metrics."""
+    """Expose Prometheus metrics (aggregated over all workers in multiprocess mode)."""
     return Response(
-        prometheus_client.generate_latest(),
+        metrics_exporter.generate_latest(),
         media_type="text/plain"
     )
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -10,6 +10,8 @@ class Vehicle(Base):
     __tablename__ = "vehicles"
     __table_args__ = (
         UniqueConstraint('number_plate', name='uq_vehicle_number_plate'),
+        # Serves list() ordering/keyset paging and the cleanup cutoff scan
+        Index('ix_vehicles_entry_timestamp_id', 'entry_timestamp', 'id'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -30,6 +32,10 @@ class SystemConfig(Base):
 class AuditLog(Base):
     """Audit log model."""
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index('ix_audit_logs_entity_timestamp', 'entity', 'timestamp'),
+        Index('ix_audit_logs_timestamp', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     action = Column(String(50), nullable=False)
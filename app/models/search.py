@@ -0,0 +1,131 @@
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import table, column
+
+from app.models.models import Vehicle
+
+
+# Lightweight handle on the SQLite FTS5 shadow table. It is deliberately not
+# part of Base.metadata: the virtual table is managed by the DDL below.
+vehicles_fts = table("vehicles_fts", column("rowid"), column("vehicles_fts"))
+
+# Trigram queries need at least three characters to hit the index
+MIN_INDEXED_TERM_LENGTH = 3
+
+SQLITE_SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS vehicles_fts USING fts5(
+        number_plate,
+        contact_name,
+        content='vehicles',
+        content_rowid='id',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vehicles_fts_ai AFTER INSERT ON vehicles BEGIN
+        INSERT INTO vehicles_fts(rowid, number_plate, contact_name)
+        VALUES (new.id, new.number_plate, new.contact_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vehicles_fts_ad AFTER DELETE ON vehicles BEGIN
+        INSERT INTO vehicles_fts(vehicles_fts, rowid, number_plate, contact_name)
+        VALUES ('delete', old.id, old.number_plate, old.contact_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vehicles_fts_au AFTER UPDATE ON vehicles BEGIN
+        INSERT INTO vehicles_fts(vehicles_fts, rowid, number_plate, contact_name)
+        VALUES ('delete', old.id, old.number_plate, old.contact_name);
+        INSERT INTO vehicles_fts(rowid, number_plate, contact_name)
+        VALUES (new.id, new.number_plate, new.contact_name);
+    END
+    """,
+    "INSERT INTO vehicles_fts(vehicles_fts) VALUES ('rebuild')",
+]
+
+SQLITE_SEARCH_INDEX_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS vehicles_fts_au",
+    "DROP TRIGGER IF EXISTS vehicles_fts_ad",
+    "DROP TRIGGER IF EXISTS vehicles_fts_ai",
+    "DROP TABLE IF EXISTS vehicles_fts",
+]
+
+POSTGRESQL_SEARCH_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_vehicles_number_plate_trgm "
+    "ON vehicles USING gin (number_plate gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_vehicles_contact_name_trgm "
+    "ON vehicles USING gin (contact_name gin_trgm_ops)",
+]
+
+POSTGRESQL_SEARCH_INDEX_DROP_DDL = [
+    "DROP INDEX IF EXISTS ix_vehicles_contact_name_trgm",
+    "DROP INDEX IF EXISTS ix_vehicles_number_plate_trgm",
+]
+
+# Database URLs known to carry the FTS5 table
+_fts_enabled: set = set()
+
+
+def install_search_index(connection: Connection) -> None:
+    """
+    Create the substring search index for the connected database.
+    Safe to call repeatedly; the FTS5 table is only built once.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        if fts_enabled(connection):
+            return
+        for statement in SQLITE_SEARCH_INDEX_DDL:
+            connection.execute(text(statement))
+        _fts_enabled.add(str(connection.engine.url))
+    elif dialect == "postgresql":
+        for statement in POSTGRESQL_SEARCH_INDEX_DDL:
+            connection.execute(text(statement))
+
+
+def drop_search_index(connection: Connection) -> None:
+    """Drop the substring search index for the connected database."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_SEARCH_INDEX_DROP_DDL:
+            connection.execute(text(statement))
+        _fts_enabled.discard(str(connection.engine.url))
+    elif dialect == "postgresql":
+        for statement in POSTGRESQL_SEARCH_INDEX_DROP_DDL:
+            connection.execute(text(statement))
+
+
+def fts_enabled(connection: Connection) -> bool:
+    """Check whether the FTS5 trigram table exists for this database."""
+    if connection.dialect.name != "sqlite":
+        return False
+    url = str(connection.engine.url)
+    if url not in _fts_enabled:
+        exists = connection.execute(
+            text(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'table' AND name = 'vehicles_fts'"
+            )
+        ).first()
+        if not exists:
+            return False
+        _fts_enabled.add(url)
+    return True
+
+
+def fts_phrase(term: str) -> str:
+    """Quote a raw search term as a single FTS5 phrase."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+@event.listens_for(Vehicle.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    install_search_index(connection)
+
+
+@event.listens_for(Vehicle.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    drop_search_index(connection)
@@ -1,29 +1,53 @@
+from typing import Any, Literal, Optional
 from pydantic import BaseModel, ConfigDict
 
 
+# How list endpoints compute pagination.total: "exact" counts matching rows,
+# "estimate" may use a maintained count instead, "none" skips it
+TotalMode = Literal["exact", "estimate", "none"]
+
+
 class Pagination(BaseModel):
-    """Base pagination schema."""
-    total: int
+    """
+    Base pagination schema.
+    Counts are omitted (null) on cursor-paginated pages and with
+    total_mode=none; has_more always tells whether another page exists.
+    """
+    total: Optional[int] = None
     skip: int
     limit: int
-    current_page: int
-    total_pages: int
-    total_items: int
+    current_page: Optional[int] = None
+    total_pages: Optional[int] = None
+    total_items: Optional[int] = None
     per_page: int
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
     @classmethod
-    def from_params(cls, total: int, skip: int, limit: int) -> "Pagination":
+    def from_params(
+        cls,
+        total: Optional[int],
+        skip: int,
+        limit: int,
+        next_cursor: Optional[str] = None,
+        has_more: bool = False
+    ) -> "Pagination":
         """Create pagination from parameters."""
-        current_page = (skip // limit) + 1
-        total_pages = (total + limit - 1) // limit
         return cls(
             total=total,
             skip=skip,
             limit=limit,
-            current_page=current_page,
-            total_pages=total_pages,
+            current_page=(skip // limit) + 1,
+            total_pages=None if total is None else (total + limit - 1) // limit,
             total_items=total,
-            per_page=limit
+            per_page=limit,
+            next_cursor=next_cursor,
+            has_more=has_more
         )
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    @classmethod
+    def from_page(cls, page: Any, skip: int, limit: int) -> "Pagination":
+        """Create pagination for a services.base.Page."""
+        return cls.from_params(page.total, skip, limit, page.next_cursor, page.has_more)
+
+    model_config = ConfigDict(from_attributes=True)
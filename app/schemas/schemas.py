@@ -24,6 +24,24 @@ class VehicleResponse(VehicleBase):
     entry_timestamp: datetime
 
 
+class VehicleBulkCreate(BaseModel):
+    """Bulk vehicle registration schema."""
+    items: List[VehicleCreate] = Field(min_length=1, max_length=1000)
+
+
+class VehicleBulkConflict(BaseModel):
+    """A vehicle from a bulk request that was not registered."""
+    index: int
+    number_plate: str
+    detail: str
+
+
+class VehicleBulkResponse(BaseModel):
+    """Bulk vehicle registration result schema."""
+    created: List[VehicleResponse]
+    conflicts: List[VehicleBulkConflict]
+
+
 class VehicleList(BaseModel):
     """Vehicle list schema."""
     items: List[VehicleResponse]
@@ -81,6 +99,25 @@ class AuditLogList(BaseModel):
     pagination: Pagination
 
 
+class HourlyOccupancy(BaseModel):
+    """Entries and exits within one hour (UTC)."""
+    hour: datetime
+    entries: int
+    exits: int
+
+
+class OccupancyStatsResponse(BaseModel):
+    """Occupancy statistics schema."""
+    parked: int
+    entries_current_hour: int
+    exits_current_hour: int
+    window_hours: int
+    entries_in_window: int
+    exits_in_window: int
+    hourly: List[HourlyOccupancy]
+    timestamp: datetime
+
+
 class MaintenanceRequest(BaseModel):
     """Maintenance request schema."""
     confirmation: str = Field(
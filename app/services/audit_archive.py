@@ -0,0 +1,434 @@
+import heapq
+import json
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from prometheus_client import Counter
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import AuditLog
+from app.services.row_counts import row_counts
+
+# Columns stored in a segment, in order
+COLUMNS = ("id", "action", "entity", "entity_id", "details", "timestamp")
+
+MANIFEST = "manifest.json"
+
+# Closes every segment, after the footer and its length
+MAGIC = b"AUDCOL1\n"
+TRAILER = struct.Struct("<Q8s")
+
+# Rows per row group: the unit a column block is compressed and skipped in
+ROWS_PER_GROUP = 4096
+
+# Held by the process archiving into a directory
+LOCK_FILE = ".archive.lock"
+
+AUDIT_ROWS_ARCHIVED = Counter(
+    "audit_rows_archived_total",
+    "Audit log rows moved from audit_logs into archive segments"
+)
+
+AUDIT_SEGMENT_READS = Counter(
+    "audit_segment_reads_total",
+    "Archive segments decompressed to answer an audit log query"
+)
+
+
+class ArchivedLog(NamedTuple):
+    """An archived audit log row, shaped like the audit_logs columns."""
+    id: int
+    action: str
+    entity: str
+    entity_id: str
+    details: Optional[str]
+    timestamp: datetime
+
+
+def _sort_key(row) -> Tuple[datetime, int]:
+    return row.timestamp, row.id
+
+
+class AuditArchive:
+    """
+    Archive of old audit logs as one columnar segment file per day.
+
+    A segment stores rows newest (timestamp, id) first in row groups of
+    ROWS_PER_GROUP. Each group holds one zlib-compressed JSON array per
+    column; a footer lists each group's block offsets and its newest and
+    oldest timestamp. Reads decode only the columns they need, and only
+    the groups overlapping their date range, so writing and reading a day
+    takes one row group of memory. A manifest records the row count of
+    each day per entity, so totals over whole archived days never open a
+    segment. Segments of up to AUDIT_SEGMENT_CACHE_ROWS rows are kept
+    decoded in memory, least recently used first out, within that many
+    rows in total.
+    """
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+        self._lock = Lock()
+        self._segments: "OrderedDict[Tuple[str, int], Tuple[ArchivedLog, ...]]" = OrderedDict()
+        self._cached_rows = 0
+        self._manifest: Tuple[Optional[str], int, Dict[str, Dict[str, int]]] = (None, 0, {})
+
+    @property
+    def directory(self) -> str:
+        return self._directory or settings.AUDIT_ARCHIVE_DIR
+
+    def segment_path(self, day: date) -> str:
+        return os.path.join(self.directory, f"audit_{day.isoformat()}.seg")
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST)
+
+    def manifest(self) -> Dict[str, Dict[str, int]]:
+        """Return {day: {entity: row count}} for every archived day."""
+        path = self._manifest_path()
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        cached_path, cached_mtime, manifest = self._manifest
+        if (cached_path, cached_mtime) != (path, mtime_ns):
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._manifest = (path, mtime_ns, manifest)
+        return manifest
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[bool]:
+        """
+        Hold the archive directory against other processes and threads.
+        Yields False, without waiting, when someone else holds it.
+        """
+        import fcntl  # POSIX only
+
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_atomic(self, path: str, payload: bytes) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _footer(segment) -> Dict[str, Any]:
+        segment.seek(-TRAILER.size, os.SEEK_END)
+        length, magic = TRAILER.unpack(segment.read(TRAILER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{segment.name} is not an audit log segment")
+        segment.seek(-TRAILER.size - length, os.SEEK_END)
+        return json.loads(segment.read(length))
+
+    def _stream_segment(
+        self,
+        path: str,
+        columns: Sequence[str] = COLUMNS,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Iterator[tuple]:
+        """
+        Yield tuples of the given columns, newest first, from the row groups
+        overlapping start_date..end_date. Rows of those groups outside the
+        range are not filtered out.
+        """
+        AUDIT_SEGMENT_READS.inc()
+        indexes = [COLUMNS.index(name) for name in columns]
+        with open(path, "rb") as segment:
+            for group in self._footer(segment)["groups"]:
+                if start_date is not None and datetime.fromisoformat(group["newest"]) < start_date:
+                    break  # Every later group is older still
+                if end_date is not None and datetime.fromisoformat(group["oldest"]) > end_date:
+                    continue
+                values = []
+                for index in indexes:
+                    offset, length = group["blocks"][index]
+                    segment.seek(offset)
+                    column = json.loads(zlib.decompress(segment.read(length)))
+                    if COLUMNS[index] == "timestamp":
+                        column = [datetime.fromisoformat(value) for value in column]
+                    values.append(column)
+                yield from zip(*values)
+
+    def _cached(self, path: str) -> Optional[Tuple[ArchivedLog, ...]]:
+        """The decoded rows of a segment if they are in memory; () without a segment."""
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            return ()
+        with self._lock:
+            rows = self._segments.get(key)
+            if rows is not None:
+                self._segments.move_to_end(key)
+            return rows
+
+    def read(
+        self,
+        day: date,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Iterator[ArchivedLog]:
+        """
+        Rows archived for a day, newest first. A segment too big to cache
+        is decoded on every read, skipping row groups outside
+        start_date..end_date; callers still filter the rows they get.
+        """
+        path = self.segment_path(day)
+        rows = self._cached(path)
+        if rows is not None:
+            return iter(rows)
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            return iter(())
+        size = sum(self.manifest().get(day.isoformat(), {}).values())
+        budget = settings.AUDIT_SEGMENT_CACHE_ROWS
+        if not size or size > budget:
+            # Too big to keep: decode it again on every read
+            return (
+                ArchivedLog(*values)
+                for values in self._stream_segment(path, start_date=start_date, end_date=end_date)
+            )
+        rows = tuple(ArchivedLog(*values) for values in self._stream_segment(path))
+        with self._lock:
+            if key not in self._segments:
+                self._segments[key] = rows
+                self._cached_rows += len(rows)
+                while self._cached_rows > budget:
+                    _, evicted = self._segments.popitem(last=False)
+                    self._cached_rows -= len(evicted)
+        return iter(rows)
+
+    def _write_group(self, segment, rows: List[ArchivedLog]) -> Dict[str, Any]:
+        """Write one row group's column blocks; returns its footer entry."""
+        blocks = []
+        for index, name in enumerate(COLUMNS):
+            column = [row[index] for row in rows]
+            if name == "timestamp":
+                column = [value.isoformat() for value in column]
+            payload = zlib.compress(json.dumps(column, separators=(",", ":")).encode())
+            blocks.append([segment.tell(), len(payload)])
+            segment.write(payload)
+        return {
+            "rows": len(rows),
+            "newest": rows[0].timestamp.isoformat(),
+            "oldest": rows[-1].timestamp.isoformat(),
+            "blocks": blocks
+        }
+
+    def _write_segment(self, day: date, rows: Iterable[ArchivedLog]) -> Dict[str, int]:
+        """Write rows (newest first) as the day's segment; returns counts per entity."""
+        counts: Dict[str, int] = {}
+        groups: List[Dict[str, Any]] = []
+        path = self.segment_path(day)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as segment:
+            group: List[ArchivedLog] = []
+            for row in rows:
+                counts[row.entity] = counts.get(row.entity, 0) + 1
+                group.append(row)
+                if len(group) >= ROWS_PER_GROUP:
+                    groups.append(self._write_group(segment, group))
+                    group = []
+            if group:
+                groups.append(self._write_group(segment, group))
+            footer = json.dumps({"columns": COLUMNS, "groups": groups}).encode()
+            segment.write(footer)
+            segment.write(TRAILER.pack(len(footer), MAGIC))
+            segment.flush()
+            os.fsync(segment.fileno())
+        os.replace(tmp, path)
+        with self._lock:
+            for key in [key for key in self._segments if key[0] == path]:
+                self._cached_rows -= len(self._segments.pop(key))
+        return counts
+
+    def archive(self, db: Session, before: datetime) -> int:
+        """
+        Move rows older than before into segments, one day at a time.
+        A day's rows are streamed from the table AUDIT_ARCHIVE_BATCH_SIZE at
+        a time and merged with any segment already written for it. The
+        segment is written before its rows are deleted, so a crash in
+        between leaves rows in both places; they are merged by id on the
+        next run. Only one process archives a directory at a time; the
+        others return 0 at once. Returns the number of rows archived.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        archived = 0
+        with self._exclusive() as acquired:
+            if not acquired:
+                return 0
+            manifest = dict(self.manifest())
+            while True:
+                oldest = db.scalar(
+                    select(AuditLog.timestamp)
+                    .where(AuditLog.timestamp < before)
+                    .order_by(AuditLog.timestamp)
+                    .limit(1)
+                )
+                if oldest is None:
+                    break
+                day = oldest.date()
+                day_start = datetime.combine(day, time.min)
+                day_end = min(day_start + timedelta(days=1), before)
+
+                in_table = [0]
+
+                def table_rows() -> Iterator[ArchivedLog]:
+                    result = db.execute(
+                        select(*(getattr(AuditLog, name) for name in COLUMNS))
+                        .where(AuditLog.timestamp >= day_start, AuditLog.timestamp < day_end)
+                        .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+                        .execution_options(yield_per=settings.AUDIT_ARCHIVE_BATCH_SIZE)
+                    )
+                    for row in result:
+                        in_table[0] += 1
+                        yield ArchivedLog(*row)
+
+                def merged() -> Iterator[ArchivedLog]:
+                    # Rows in both places after a crash are adjacent and equal
+                    previous = None
+                    for row in heapq.merge(
+                        table_rows(), self.read(day), key=_sort_key, reverse=True
+                    ):
+                        if _sort_key(row) != previous:
+                            previous = _sort_key(row)
+                            yield row
+
+                manifest[day.isoformat()] = self._write_segment(day, merged())
+                self._write_atomic(
+                    self._manifest_path(), json.dumps(manifest).encode()
+                )
+
+                db.execute(
+                    delete(AuditLog)
+                    .where(AuditLog.timestamp >= day_start, AuditLog.timestamp < day_end)
+                    .execution_options(synchronize_session=False)
+                )
+                row_counts.adjust(db, AuditLog.__table__, -in_table[0])
+                db.commit()
+                archived += in_table[0]
+        AUDIT_ROWS_ARCHIVED.inc(archived)
+        return archived
+
+    def _days(
+        self,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> List[date]:
+        """Archived days overlapping the range, newest first."""
+        days = sorted(
+            (date.fromisoformat(day) for day in self.manifest()), reverse=True
+        )
+        return [
+            day for day in days
+            if (start_date is None or day >= start_date.date())
+            and (end_date is None or day <= end_date.date())
+        ]
+
+    def covers(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> bool:
+        """Whether any archived day overlaps the range."""
+        return bool(self._days(start_date, end_date))
+
+    @staticmethod
+    def _matches(
+        row: ArchivedLog,
+        entity: Optional[str],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> bool:
+        return (
+            (entity is None or row.entity == entity)
+            and (start_date is None or row.timestamp >= start_date)
+            and (end_date is None or row.timestamp <= end_date)
+        )
+
+    def count(
+        self,
+        entity: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> int:
+        """Count archived rows matching the filters."""
+        manifest = self.manifest()
+        total = 0
+        for day in self._days(start_date, end_date):
+            day_start = datetime.combine(day, time.min)
+            whole_day = (
+                (start_date is None or start_date <= day_start)
+                and (end_date is None or end_date >= day_start + timedelta(days=1))
+            )
+            if whole_day:
+                counts = manifest[day.isoformat()]
+                total += counts.get(entity, 0) if entity else sum(counts.values())
+            else:
+                total += self._count_segment(day, entity, start_date, end_date)
+        return total
+
+    def _count_segment(
+        self,
+        day: date,
+        entity: Optional[str],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> int:
+        """Count a day's matching rows, decoding only entity and timestamp."""
+        path = self.segment_path(day)
+        rows = self._cached(path)
+        if rows is None:
+            rows = (
+                ArchivedLog(None, None, row_entity, None, None, timestamp)
+                for row_entity, timestamp in self._stream_segment(
+                    path, ("entity", "timestamp"), start_date, end_date
+                )
+            )
+        return sum(1 for row in rows if self._matches(row, entity, start_date, end_date))
+
+    def scan(
+        self,
+        entity: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        before: Optional[Tuple[datetime, int]] = None
+    ) -> Iterator[ArchivedLog]:
+        """
+        Yield archived rows matching the filters, newest first, starting
+        after the (timestamp, id) key before when given.
+        """
+        for day in self._days(start_date, end_date):
+            if before is not None and day > before[0].date():
+                continue
+            for row in self.read(day, start_date, end_date):
+                if start_date is not None and row.timestamp < start_date:
+                    break  # Everything after is older still
+                if before is not None and _sort_key(row) >= before:
+                    continue
+                if self._matches(row, entity, start_date, end_date):
+                    yield row
+
+
+# Create archive instance
+audit_archive = AuditArchive()
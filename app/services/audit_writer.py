@@ -0,0 +1,352 @@
+import asyncio
+import glob
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from threading import Lock
+from typing import Deque, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import gauge_function
+from app.models.models import AuditLog
+from app.services.row_counts import row_counts
+
+AUDIT_QUEUE_DEPTH = Gauge(
+    "audit_queue_depth",
+    "Audit events committed but not yet written to audit_logs",
+    multiprocess_mode="livesum"
+)
+
+AUDIT_FLUSH_LATENCY = Histogram(
+    "audit_flush_duration_seconds",
+    "Time to write one batch of queued audit events"
+)
+
+AUDIT_EVENTS_WRITTEN = Counter(
+    "audit_events_written_total",
+    "Audit events written by the background writer"
+)
+
+# Session.info key holding events of the transaction in progress
+PENDING_KEY = "pending_audit_events"
+
+
+class AuditWriter:
+    """
+    Background writer for audit events (AUDIT_MODE=async).
+
+    Events logged inside a transaction are held on the session until it
+    commits, then handed to the spool task. It appends everything handed
+    over since its last pass to this process's spool file in a thread, with
+    one fsync per group, and queues it. A background task writes the queue
+    to audit_logs in batches of AUDIT_BATCH_SIZE, at least every
+    AUDIT_FLUSH_INTERVAL_SECONDS, and records the last written seq in the
+    spool's .ack file. Events committed in the moment before their group is
+    fsynced are lost if the process dies then.
+
+    Each worker process spools to AUDIT_SPOOL_PATH.<pid> and holds an flock
+    on it while it runs. On startup a worker replays the spools whose lock
+    it can take, i.e. those left by processes that died before writing
+    them, so an event may be written twice after a crash but is never lost.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        # Serializes spool file writes, compaction and acknowledgements
+        self._spool_lock = Lock()
+        # Committed events not yet in the spool, and spooled ones to write
+        self._unspooled: List[dict] = []
+        self._queue: Deque[dict] = deque()
+        self._seq = 0
+        self._spool = None
+        self._spool_path: Optional[str] = None
+        # Acknowledged lines still in the spool, dropped by _compact
+        self._acked_lines = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._spool_wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._spool_task: Optional[asyncio.Task] = None
+        gauge_function(AUDIT_QUEUE_DEPTH, lambda: len(self._unspooled) + len(self._queue))
+
+    @property
+    def spool_path(self) -> str:
+        """This process's spool file."""
+        return f"{settings.AUDIT_SPOOL_PATH}.{os.getpid()}"
+
+    def is_full(self) -> bool:
+        return len(self._unspooled) + len(self._queue) >= settings.AUDIT_QUEUE_MAX
+
+    def _open_spool(self, path: str):
+        """Open a spool for appending, locked for the life of this process."""
+        import fcntl  # POSIX only
+
+        spool = open(path, "a", encoding="utf-8")
+        fcntl.flock(spool, fcntl.LOCK_EX)
+        return spool
+
+    def submit(self, events: List[dict]) -> None:
+        """
+        Hand over events whose transaction has committed.
+        Runs in the committing thread, often the event loop's, so the disk
+        work is left to the spool task; without one (writer not started)
+        the events are spooled right away.
+        """
+        if not events:
+            return
+        with self._lock:
+            for audit_event in events:
+                self._seq += 1
+                audit_event["seq"] = self._seq
+            self._unspooled.extend(events)
+        if self._loop is None:
+            self._spool_events()
+        else:
+            self._loop.call_soon_threadsafe(self._spool_wakeup.set)
+
+    def _spool_events(self) -> int:
+        """Append and fsync the events handed over so far, then queue them."""
+        with self._spool_lock:
+            with self._lock:
+                events, self._unspooled = self._unspooled, []
+            if not events:
+                return 0
+            try:
+                if self._spool is None:
+                    self._spool_path = self.spool_path
+                    self._spool = self._open_spool(self._spool_path)
+                self._spool.write("".join(
+                    json.dumps(audit_event, default=str) + "\n" for audit_event in events
+                ))
+                self._spool.flush()
+                os.fsync(self._spool.fileno())
+            except Exception:
+                with self._lock:
+                    self._unspooled[:0] = events
+                raise
+            with self._lock:
+                self._queue.extend(events)
+                wake = len(self._queue) >= settings.AUDIT_BATCH_SIZE
+        if wake and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return len(events)
+
+    @staticmethod
+    def write_batch(db: Session, events: List[dict]) -> None:
+        """Insert a batch of events with a single executemany."""
+        db.execute(
+            insert(AuditLog),
+            [
+                {
+                    "action": e["action"],
+                    "entity": e["entity"],
+                    "entity_id": e["entity_id"],
+                    "details": e["details"],
+                    "timestamp": datetime.fromisoformat(e["timestamp"])
+                    if isinstance(e["timestamp"], str) else e["timestamp"]
+                }
+                for e in events
+            ]
+        )
+        row_counts.adjust(db, AuditLog.__table__, len(events))
+        db.commit()
+
+    def _acknowledge(self, seq: int, count: int) -> None:
+        """Record that events up to seq are in the database."""
+        with self._spool_lock:
+            if self._spool is None:
+                return
+            with open(self._spool_path + ".ack", "w", encoding="utf-8") as ack:
+                ack.write(str(seq))
+            self._acked_lines += count
+            # Rewriting costs one line per queued event, so compacting once
+            # as many lines are acknowledged keeps the spool O(queue) in size
+            if self._acked_lines >= max(len(self._queue), settings.AUDIT_BATCH_SIZE):
+                self._compact()
+            elif not self._queue:
+                self._spool.truncate(0)
+                self._acked_lines = 0
+
+    def _compact(self) -> None:
+        """Replace the spool with the events still queued. Holds self._spool_lock."""
+        with self._lock:
+            queued = list(self._queue)
+        temp_path = self._spool_path + ".tmp"
+        spool = self._open_spool(temp_path)
+        spool.truncate(0)
+        spool.write("".join(
+            json.dumps(audit_event, default=str) + "\n" for audit_event in queued
+        ))
+        spool.flush()
+        os.fsync(spool.fileno())
+        # The new file is locked before it takes the spool's name
+        os.replace(temp_path, self._spool_path)
+        self._spool.close()
+        self._spool = spool
+        self._acked_lines = 0
+
+    def _spool_paths(self) -> List[str]:
+        """Spools of every process, plus the unsuffixed one older versions used."""
+        base = settings.AUDIT_SPOOL_PATH
+        paths = [base] if os.path.exists(base) else []
+        paths.extend(
+            path for path in sorted(glob.glob(glob.escape(base) + ".*"))
+            if not path.endswith((".ack", ".tmp"))
+        )
+        return paths
+
+    def _recover_spool(self, db: Session, path: str) -> Optional[int]:
+        """
+        Replay one spool unless its writer still holds it.
+        Returns the number of events written, or None if it was skipped.
+        """
+        import fcntl  # POSIX only
+
+        try:
+            spool = open(path, encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        with spool:
+            try:
+                fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return None  # A running worker's spool
+            if os.fstat(spool.fileno()).st_nlink == 0:
+                return None  # Replayed by another worker while we waited
+            acked = 0
+            if os.path.exists(path + ".ack"):
+                with open(path + ".ack", encoding="utf-8") as ack:
+                    acked = int(ack.read().strip() or 0)
+            events = []
+            for line in spool:
+                try:
+                    audit_event = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line
+                if audit_event.get("seq", 0) > acked:
+                    events.append(audit_event)
+            for start in range(0, len(events), settings.AUDIT_BATCH_SIZE):
+                self.write_batch(db, events[start:start + settings.AUDIT_BATCH_SIZE])
+            # Unlink while still locked so nobody replays it again
+            os.remove(path)
+        if os.path.exists(path + ".ack"):
+            os.remove(path + ".ack")
+        return len(events)
+
+    def recover(self, db: Session) -> int:
+        """Write events left in spools by processes that have stopped."""
+        written = 0
+        for path in self._spool_paths():
+            if path == self._spool_path:
+                continue
+            written += self._recover_spool(db, path) or 0
+        return written
+
+    async def flush(self, session_factory) -> int:
+        """Write everything queued so far. Returns the number of events."""
+        written = 0
+        while self._queue:
+            with self._lock:
+                batch = [
+                    self._queue[i]
+                    for i in range(min(settings.AUDIT_BATCH_SIZE, len(self._queue)))
+                ]
+            start_time = time.perf_counter()
+            async with session_factory() as db:
+                await db.run_sync(self.write_batch, batch)
+            AUDIT_FLUSH_LATENCY.observe(time.perf_counter() - start_time)
+            with self._lock:
+                for _ in batch:
+                    self._queue.popleft()
+            AUDIT_EVENTS_WRITTEN.inc(len(batch))
+            written += len(batch)
+            await asyncio.to_thread(self._acknowledge, batch[-1]["seq"], len(batch))
+        return written
+
+    async def run_spool(self) -> None:
+        """Spool handed over events in groups, one fsync per group."""
+        while True:
+            await self._spool_wakeup.wait()
+            self._spool_wakeup.clear()
+            try:
+                await asyncio.to_thread(self._spool_events)
+            except Exception as e:
+                # Events stay handed over; retry on the next submission
+                print(f"Error spooling audit events: {e}")
+
+    async def run(self, session_factory) -> None:
+        """Flush on a timer, or early once a full batch is queued."""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    timeout=settings.AUDIT_FLUSH_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush(session_factory)
+            except Exception as e:
+                # Events stay queued and spooled; retry on the next tick
+                print(f"Error in audit writer: {e}")
+
+    async def start(self, session_factory) -> None:
+        """Replay the spool and start the background flush task."""
+        async with session_factory() as db:
+            await db.run_sync(self.recover)
+        self._wakeup = asyncio.Event()
+        self._spool_wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self.run(session_factory))
+        self._spool_task = asyncio.create_task(self.run_spool())
+
+    async def stop(self, session_factory) -> None:
+        """Stop the background tasks and write whatever is still queued."""
+        for task in (self._task, self._spool_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._spool_task = None
+        try:
+            await asyncio.to_thread(self._spool_events)
+            await self.flush(session_factory)
+        except Exception as e:
+            print(f"Error flushing audit writer on shutdown: {e}")
+        with self._spool_lock:
+            if self._spool is not None:
+                # Everything was written: leave nothing to replay
+                if not self._queue:
+                    os.remove(self._spool_path)
+                    if os.path.exists(self._spool_path + ".ack"):
+                        os.remove(self._spool_path + ".ack")
+                self._spool.close()
+                self._spool = None
+                self._spool_path = None
+        self._loop = None
+
+
+# Create writer instance
+audit_writer = AuditWriter()
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_pending_events(session: Session) -> None:
+    events = session.info.pop(PENDING_KEY, None)
+    if events:
+        audit_writer.submit(events)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_events(session: Session, previous_transaction) -> None:
+    # Only a rollback of the outermost transaction drops its events
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
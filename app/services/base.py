@@ -1,16 +1,104 @@
-from typing import Generic, TypeVar, Type, Optional, List, Any, Dict
-from sqlalchemy.orm import Session
-from sqlalchemy import select, update, delete, func
-from fastapi import HTTPException
+from typing import Generic, TypeVar, Type, Optional, List, Any, Callable, Dict, NamedTuple, Tuple
+from sqlalchemy.orm import Session, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, func, tuple_
+from fastapi import HTTPException, status
 from datetime import datetime
+import base64
+import binascii
+import json
 
-from app.models.base import BaseModel
+from app.models.base import Base
 
-ModelType = TypeVar("ModelType", bound=BaseModel)
+ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType")
 UpdateSchemaType = TypeVar("UpdateSchemaType")
 
 
+class Page(NamedTuple):
+    """A page of results with its total count and keyset cursor."""
+    items: List[Any]
+    total: Optional[int]
+    next_cursor: Optional[str]
+    has_more: bool = False
+
+
+def count_total(
+    query: Query,
+    total_mode: str = "exact",
+    estimate: Optional[Callable[[], int]] = None
+) -> Optional[int]:
+    """
+    Total row count for a page according to total_mode.
+    "exact" counts the query, "none" skips counting, and "estimate" uses
+    estimate() when the caller has a maintained count for this query,
+    falling back to an exact count otherwise.
+    """
+    if total_mode == "none":
+        return None
+    if total_mode == "estimate" and estimate is not None:
+        return estimate()
+    return query.count()
+
+
+def encode_cursor(timestamp: datetime, id: int) -> str:
+    """Encode a (timestamp, id) sort key as an opaque cursor."""
+    raw = json.dumps([timestamp.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def paginate(
+    query: Query,
+    timestamp_column: Any,
+    id_column: Any,
+    *,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    descending: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of a query ordered by (timestamp, id).
+    With a cursor, rows are located by keyset instead of offset and skip is
+    ignored. Returns the rows and the cursor of the following page, if any.
+    """
+    key = tuple_(timestamp_column, id_column)
+    if cursor:
+        after = decode_cursor(cursor)
+        query = query.filter(key < after if descending else key > after)
+        skip = 0
+
+    if descending:
+        query = query.order_by(timestamp_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(timestamp_column.asc(), id_column.asc())
+
+    # One extra row tells us whether another page exists
+    rows = query.offset(skip).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, timestamp_column.key),
+            getattr(last, id_column.key)
+        )
+    return rows, next_cursor
+
+
 class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     Base class for all services providing common CRUD operations.
@@ -112,4 +200,51 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def exists(self, db: Session, id: Any) -> bool:
         """Check if a record exists."""
         query = select(func.count()).select_from(self.model).where(self.model.id == id)
-        return db.execute(query).scalar() > 0
\ No newline at end of file
+        return db.execute(query).scalar() > 0
+
+    # Awaitable variants. Each runs the synchronous method above on the
+    # AsyncSession's underlying Session, so database I/O goes through the
+    # async driver and never blocks the event loop.
+
+    async def aget(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """Get a record by id."""
+        return await db.run_sync(self.get, id)
+
+    async def aget_by_field(
+        self,
+        db: AsyncSession,
+        field: str,
+        value: Any
+    ) -> Optional[ModelType]:
+        """Get a record by a specific field value."""
+        return await db.run_sync(self.get_by_field, field, value)
+
+    async def alist(self, db: AsyncSession, **kwargs: Any) -> tuple[List[ModelType], int]:
+        """Get a list of records with pagination."""
+        return await db.run_sync(self.list, **kwargs)
+
+    async def acreate(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """Create a new record."""
+        return await db.run_sync(self.create, obj_in=obj_in)
+
+    async def aupdate(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: UpdateSchemaType | Dict[str, Any]
+    ) -> ModelType:
+        """Update a record."""
+        return await db.run_sync(self.update, db_obj=db_obj, obj_in=obj_in)
+
+    async def adelete(self, db: AsyncSession, *, id: Any) -> ModelType:
+        """Delete a record."""
+        return await db.run_sync(self.delete, id=id)
+
+    async def acount(self, db: AsyncSession) -> int:
+        """Get total count of records."""
+        return await db.run_sync(self.count)
+
+    async def aexists(self, db: AsyncSession, id: Any) -> bool:
+        """Check if a record exists."""
+        return await db.run_sync(self.exists, id)
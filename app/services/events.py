@@ -0,0 +1,123 @@
+import asyncio
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional, Set
+
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+from app.core.metrics import gauge_function
+
+OCCUPANCY_SUBSCRIBERS = Gauge(
+    "occupancy_subscribers",
+    "WebSocket clients subscribed to the occupancy feed",
+    multiprocess_mode="livesum"
+)
+
+OCCUPANCY_EVENTS_PUBLISHED = Counter(
+    "occupancy_events_published_total",
+    "Occupancy diffs published to subscribers"
+)
+
+OCCUPANCY_SLOW_CONSUMERS = Counter(
+    "occupancy_slow_consumers_dropped_total",
+    "Subscribers dropped because their send queue overflowed"
+)
+
+
+class Subscription:
+    """
+    One subscriber's bounded queue of pending events.
+    Events are delivered on the subscriber's event loop. When the queue is
+    full the subscriber is dropped: its backlog is discarded and get()
+    returns None, telling the consumer to disconnect.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.loop = loop
+        self.dropped = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        if self.dropped:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = True
+            OCCUPANCY_SLOW_CONSUMERS.inc()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """Next event, or None once the subscriber has been dropped."""
+        return await self._queue.get()
+
+
+class OccupancyHub:
+    """
+    In-process pub/sub hub for vehicle entries and exits.
+    Services publish after their transaction commits, from any thread;
+    each subscriber receives the events on its own loop.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._subscribers: Set[Subscription] = set()
+        gauge_function(OCCUPANCY_SUBSCRIBERS, lambda: len(self._subscribers))
+
+    def subscribe(self, max_queue: Optional[int] = None) -> Subscription:
+        """Subscribe the calling event loop to occupancy events."""
+        subscription = Subscription(
+            asyncio.get_running_loop(),
+            max_queue or settings.WS_SUBSCRIBER_QUEUE_SIZE
+        )
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Send an event to every subscriber. A no-op when there are none."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        event = {"type": "occupancy", **event, "timestamp": datetime.utcnow().isoformat()}
+        OCCUPANCY_EVENTS_PUBLISHED.inc()
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                self.unsubscribe(subscription)
+
+    def entered(self, vehicles: Iterable[Any]) -> None:
+        """Publish newly registered vehicles."""
+        entered = [
+            {
+                "number_plate": v.number_plate,
+                "contact_name": v.contact_name,
+                "phone_number": v.phone_number,
+                "entry_timestamp": v.entry_timestamp.isoformat()
+            }
+            for v in vehicles
+        ]
+        if entered:
+            self.publish({"entered": entered, "exited": []})
+
+    def exited(self, number_plates: Iterable[str], reason: str) -> None:
+        """Publish vehicles that left, were removed or expired."""
+        exited = list(number_plates)
+        if exited:
+            self.publish({"entered": [], "exited": exited, "reason": reason})
+
+    def reset(self) -> None:
+        """Publish that every vehicle was removed at once."""
+        self.publish({"entered": [], "exited": [], "reset": True})
+
+
+# Create hub instance
+occupancy_hub = OccupancyHub()
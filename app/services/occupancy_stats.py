@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import gauge_function
+from app.models.models import AuditLog, Vehicle
+
+EPOCH = datetime(1970, 1, 1)
+
+PARKED_VEHICLES = Gauge(
+    "parking_vehicles_parked",
+    "Vehicles currently parked",
+    # Every worker recounts the same table, so the freshest value wins
+    multiprocess_mode="livemostrecent"
+)
+
+ENTRIES_CURRENT_HOUR = Gauge(
+    "parking_entries_current_hour",
+    "Vehicles registered since the start of the current hour (UTC)",
+    multiprocess_mode="livemax"
+)
+
+VEHICLE_ENTRIES = Counter(
+    "parking_vehicle_entries_total",
+    "Vehicles registered"
+)
+
+VEHICLE_EXITS = Counter(
+    "parking_vehicle_exits_total",
+    "Vehicles that left, by reason (removed, expired)",
+    ["reason"]
+)
+
+
+def hour_of(timestamp: datetime) -> int:
+    """Hours since the epoch of a naive UTC timestamp."""
+    return int((timestamp - EPOCH).total_seconds() // 3600)
+
+
+class OccupancyStats:
+    """
+    Occupancy counters kept current by the vehicle service.
+
+    The number of parked vehicles is counted at startup, adjusted on every
+    entry and exit this process handles, and recounted from the table
+    every STATS_REFRESH_SECONDS so that other workers' entries and exits
+    are reflected too. Entries and exits per hour are kept
+    in a ring buffer of the last `hours` hours: each slot remembers which
+    hour it holds and is zeroed when that hour comes round again, so
+    reading the stats never touches the database.
+    """
+    def __init__(self, hours: Optional[int] = None):
+        self.hours = hours or settings.STATS_HISTORY_HOURS
+        self._lock = Lock()
+        self._parked = 0
+        # One [hour, entries, exits] slot per hour, indexed by hour % hours
+        self._slots: List[List[int]] = [[-1, 0, 0] for _ in range(self.hours)]
+
+    @property
+    def parked(self) -> int:
+        return self._parked
+
+    def _slot(self, hour: int) -> Optional[List[int]]:
+        """The slot for hour, claiming it if it holds an older hour."""
+        slot = self._slots[hour % self.hours]
+        if slot[0] > hour:
+            return None  # Older than the window
+        if slot[0] < hour:
+            slot[:] = [hour, 0, 0]
+        return slot
+
+    def _slot_counts(self, hour: int) -> List[int]:
+        slot = self._slots[hour % self.hours]
+        return slot[1:] if slot[0] == hour else [0, 0]
+
+    def _record(self, timestamp: datetime, column: int, count: int) -> None:
+        slot = self._slot(hour_of(timestamp))
+        if slot is not None:
+            slot[column] += count
+
+    def rebuild(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Count parked vehicles and replay the audit log of the last `hours`
+        hours into the histogram. Returns the parked count.
+        """
+        now = now or datetime.utcnow()
+        since = now.replace(minute=0, second=0, microsecond=0) - timedelta(
+            hours=self.hours - 1
+        )
+        parked = db.scalar(select(func.count()).select_from(Vehicle))
+        rows = db.execute(
+            select(AuditLog.action, AuditLog.timestamp)
+            .where(
+                AuditLog.entity == "Vehicle",
+                AuditLog.timestamp >= since,
+                AuditLog.action.in_(("CREATE", "DELETE"))
+            )
+        ).all()
+
+        with self._lock:
+            self._parked = parked
+            self._slots = [[-1, 0, 0] for _ in range(self.hours)]
+            for action, timestamp in rows:
+                self._record(timestamp, 1 if action == "CREATE" else 2, 1)
+        return parked
+
+    def recount(self, db: Session) -> int:
+        """Set the parked count from the vehicles table. Returns it."""
+        parked = db.scalar(select(func.count()).select_from(Vehicle))
+        with self._lock:
+            self._parked = parked
+        return parked
+
+    def entered(self, vehicles: Iterable[Vehicle]) -> None:
+        """Count newly registered vehicles."""
+        timestamps = [vehicle.entry_timestamp for vehicle in vehicles]
+        if not timestamps:
+            return
+        with self._lock:
+            self._parked += len(timestamps)
+            for timestamp in timestamps:
+                self._record(timestamp, 1, 1)
+        VEHICLE_ENTRIES.inc(len(timestamps))
+
+    def exited(self, count: int, reason: str, at: Optional[datetime] = None) -> None:
+        """Count vehicles that left, were removed or expired."""
+        if count <= 0:
+            return
+        with self._lock:
+            self._parked = max(0, self._parked - count)
+            self._record(at or datetime.utcnow(), 2, count)
+        VEHICLE_EXITS.labels(reason=reason).inc(count)
+
+    def reset(self) -> None:
+        """Every vehicle was removed at once (the database was cleared)."""
+        with self._lock:
+            self._parked = 0
+
+    def snapshot(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Current occupancy and hourly entries/exits, oldest hour first."""
+        now = now or datetime.utcnow()
+        hours = range(hour_of(now) - self.hours + 1, hour_of(now) + 1)
+        with self._lock:
+            parked = self._parked
+            counts = [self._slot_counts(hour) for hour in hours]
+        hourly = [
+            {"hour": EPOCH + timedelta(hours=hour), "entries": entries, "exits": exits}
+            for hour, (entries, exits) in zip(hours, counts)
+        ]
+        return {
+            "parked": parked,
+            "entries_current_hour": hourly[-1]["entries"],
+            "exits_current_hour": hourly[-1]["exits"],
+            "window_hours": self.hours,
+            "entries_in_window": sum(h["entries"] for h in hourly),
+            "exits_in_window": sum(h["exits"] for h in hourly),
+            "hourly": hourly,
+            "timestamp": now
+        }
+
+
+# Create stats instance
+occupancy_stats = OccupancyStats()
+gauge_function(PARKED_VEHICLES, lambda: occupancy_stats.parked)
+gauge_function(
+    ENTRIES_CURRENT_HOUR,
+    lambda: occupancy_stats.snapshot()["entries_current_hour"]
+)
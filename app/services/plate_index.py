@@ -0,0 +1,257 @@
+from bisect import bisect_left, insort
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.metrics import gauge_function
+from app.models.models import Vehicle
+
+# Separates the indexed key from the number plate it points to
+SEP = "\x00"
+
+PLATE_INDEX_SIZE = Gauge(
+    "plate_index_vehicles",
+    "Active vehicles held in the in-memory plate index",
+    multiprocess_mode="livemax"
+)
+
+PLATE_INDEX_LOOKUPS = Counter(
+    "plate_index_lookups_total",
+    "Typeahead lookups by outcome (hit: served from memory, miss: database)",
+    ["result"]
+)
+
+
+class IndexedVehicle(NamedTuple):
+    """Vehicle fields needed to answer a typeahead query."""
+    number_plate: str
+    contact_name: str
+    phone_number: str
+    entry_timestamp: datetime
+
+
+def normalize_plate(value: str) -> str:
+    """Normalize a plate for matching: casefold and drop separators."""
+    return "".join(ch for ch in value.casefold() if ch.isalnum())
+
+
+def normalize_name(value: str) -> str:
+    """Normalize a contact name for matching."""
+    return " ".join(value.casefold().split())
+
+
+class PlateIndex:
+    """
+    In-memory typeahead index over active vehicles.
+
+    Each worker process holds its own index. It is updated in place by the
+    writes this process makes and refreshed from the database every
+    PLATE_INDEX_REFRESH_SECONDS to pick up those of other workers.
+
+    Plates are indexed by every suffix (so any substring of a plate is the
+    prefix of one of its suffixes) and contact names by every word. Both are
+    kept as sorted lists of "key<SEP>plate" strings, so a lookup is a binary
+    search plus a scan over the matching range.
+    """
+    def __init__(self, min_term_length: int = 2):
+        self.min_term_length = min_term_length
+        self.ready = False
+        self._lock = Lock()
+        # Highest vehicle id indexed and its plate, for refresh()
+        self._watermark: Tuple[int, Optional[str]] = (0, None)
+        self._vehicles: Dict[str, IndexedVehicle] = {}
+        self._plate_keys: List[str] = []
+        self._name_keys: List[str] = []
+        gauge_function(PLATE_INDEX_SIZE, lambda: len(self._vehicles))
+
+    def __len__(self) -> int:
+        return len(self._vehicles)
+
+    def _plate_entries(self, vehicle: IndexedVehicle) -> List[str]:
+        plate = normalize_plate(vehicle.number_plate)
+        return [
+            plate[i:] + SEP + vehicle.number_plate
+            for i in range(len(plate) - self.min_term_length + 1)
+        ] or [plate + SEP + vehicle.number_plate]
+
+    def _name_entries(self, vehicle: IndexedVehicle) -> List[str]:
+        name = normalize_name(vehicle.contact_name)
+        words = name.split(" ")
+        # Index the full name too, so multi-word terms ("jane d") still match
+        return sorted({
+            word + SEP + vehicle.number_plate for word in words + [name] if word
+        })
+
+    @staticmethod
+    def _remove_sorted(keys: List[str], entry: str) -> None:
+        i = bisect_left(keys, entry)
+        if i < len(keys) and keys[i] == entry:
+            del keys[i]
+
+    @staticmethod
+    def _scan(keys: List[str], term: str) -> Iterable[str]:
+        """Yield plates whose key starts with term."""
+        i = bisect_left(keys, term)
+        while i < len(keys) and keys[i].startswith(term):
+            yield keys[i].split(SEP, 1)[1]
+            i += 1
+
+    @staticmethod
+    def _select():
+        return select(
+            Vehicle.number_plate,
+            Vehicle.contact_name,
+            Vehicle.phone_number,
+            Vehicle.entry_timestamp,
+            Vehicle.id
+        )
+
+    def rebuild(self, db: Session) -> int:
+        """Rebuild the index from the database. Returns the vehicle count."""
+        rows = db.execute(self._select()).all()
+        vehicles = {row[0]: IndexedVehicle(*row[:4]) for row in rows}
+        newest = max(rows, key=lambda row: row.id, default=None)
+        plate_keys: List[str] = []
+        name_keys: List[str] = []
+        for vehicle in vehicles.values():
+            plate_keys.extend(self._plate_entries(vehicle))
+            name_keys.extend(self._name_entries(vehicle))
+        plate_keys.sort()
+        name_keys.sort()
+
+        with self._lock:
+            self._vehicles = vehicles
+            self._plate_keys = plate_keys
+            self._name_keys = name_keys
+            self._watermark = (newest.id, newest.number_plate) if newest else (0, None)
+            self.ready = True
+        return len(vehicles)
+
+    def refresh(self, db: Session) -> int:
+        """
+        Catch up with writes made by other worker processes.
+        Vehicles with an id above the highest one indexed are added. The
+        index is rebuilt instead if that vehicle is gone or its id now
+        belongs to another plate (SQLite reuses the ids of deleted rows at
+        the top), or if the index then holds a different number of vehicles
+        than the table because some were removed elsewhere. Returns the
+        number of vehicles added, or -1 after a rebuild.
+        """
+        max_id, max_plate = self._watermark
+        if max_id and db.scalar(
+            select(Vehicle.number_plate).where(Vehicle.id == max_id)
+        ) != max_plate:
+            self.rebuild(db)
+            return -1
+        rows = db.execute(self._select().where(Vehicle.id > max_id)).all()
+        self.add_many(rows)
+        if db.scalar(select(func.count()).select_from(Vehicle)) != len(self):
+            self.rebuild(db)
+            return -1
+        return len(rows)
+
+    def add(self, vehicle: Vehicle) -> None:
+        """Index a newly registered vehicle."""
+        self.add_many([vehicle])
+
+    def add_many(self, vehicles: Iterable[Vehicle]) -> None:
+        """
+        Index newly registered vehicles (or rows with the same columns).
+        A batch's keys are sorted once and merged into the index, so bulk
+        registrations cost one pass over it rather than one per vehicle.
+        """
+        entries = []
+        newest = None
+        for vehicle in vehicles:
+            entries.append(IndexedVehicle(
+                vehicle.number_plate,
+                vehicle.contact_name,
+                vehicle.phone_number,
+                vehicle.entry_timestamp
+            ))
+            if newest is None or vehicle.id > newest.id:
+                newest = vehicle
+        if not entries:
+            return
+        plate_keys: List[str] = []
+        name_keys: List[str] = []
+        for entry in entries:
+            plate_keys.extend(self._plate_entries(entry))
+            name_keys.extend(self._name_entries(entry))
+        with self._lock:
+            for entry in entries:
+                if entry.number_plate in self._vehicles:
+                    self._discard(entry.number_plate)
+                self._vehicles[entry.number_plate] = entry
+            if len(entries) == 1:
+                for key in plate_keys:
+                    insort(self._plate_keys, key)
+                for key in name_keys:
+                    insort(self._name_keys, key)
+            else:
+                # Appended to a sorted list, the batch is one more run to merge
+                self._plate_keys.extend(plate_keys)
+                self._plate_keys.sort()
+                self._name_keys.extend(name_keys)
+                self._name_keys.sort()
+            if newest.id > self._watermark[0]:
+                self._watermark = (newest.id, newest.number_plate)
+
+    def _discard(self, number_plate: str) -> None:
+        entry = self._vehicles.pop(number_plate, None)
+        if entry is None:
+            return
+        for key in self._plate_entries(entry):
+            self._remove_sorted(self._plate_keys, key)
+        for key in self._name_entries(entry):
+            self._remove_sorted(self._name_keys, key)
+
+    def remove(self, number_plate: str) -> None:
+        """Drop a vehicle from the index."""
+        with self._lock:
+            self._discard(number_plate)
+
+    def clear(self) -> None:
+        """Empty the index (the database was cleared)."""
+        with self._lock:
+            self._vehicles = {}
+            self._plate_keys = []
+            self._name_keys = []
+            self._watermark = (0, None)
+
+    def search(self, term: str, limit: int = 10) -> Optional[List[IndexedVehicle]]:
+        """
+        Find vehicles whose plate contains the term or whose contact name
+        has a word starting with it. Returns None when the index has not
+        been built yet and the caller must query the database.
+        """
+        if not self.ready:
+            PLATE_INDEX_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        results: Dict[str, IndexedVehicle] = {}
+        with self._lock:
+            plate_term = normalize_plate(term)
+            name_term = normalize_name(term)
+            scans = []
+            if plate_term:
+                scans.append(self._scan(self._plate_keys, plate_term))
+            if name_term:
+                scans.append(self._scan(self._name_keys, name_term))
+            for scan in scans:
+                for plate in scan:
+                    if len(results) >= limit:
+                        break
+                    if plate not in results:
+                        results[plate] = self._vehicles[plate]
+
+        PLATE_INDEX_LOOKUPS.labels(result="hit").inc()
+        return list(results.values())
+
+
+# Create index instance
+plate_index = PlateIndex()
@@ -0,0 +1,82 @@
+import time
+from threading import Lock
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Table, event, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# Session.info key holding count changes of the transaction in progress
+PENDING_KEY = "pending_row_count_changes"
+
+
+class RowCounts:
+    """
+    Approximate row counts of whole tables, for total_mode=estimate.
+
+    A table is counted once, then kept current by the services adjusting the
+    count as they insert and delete rows. Counts are per process, so they
+    drift when other workers write; they are recounted every
+    ROW_COUNT_REFRESH_SECONDS to bound that drift.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._counts: Dict[Tuple[str, str], Tuple[int, float]] = {}
+
+    @staticmethod
+    def _key(db: Session, table: Table) -> Tuple[str, str]:
+        return str(db.get_bind().engine.url), table.name
+
+    def get(self, db: Session, table: Table) -> int:
+        """Return the maintained count, counting the table if needed."""
+        key = self._key(db, table)
+        with self._lock:
+            entry = self._counts.get(key)
+        if entry is not None and time.monotonic() - entry[1] < settings.ROW_COUNT_REFRESH_SECONDS:
+            return entry[0]
+        count = db.scalar(select(func.count()).select_from(table))
+        with self._lock:
+            self._counts[key] = (count, time.monotonic())
+        return count
+
+    def adjust(self, db: Session, table: Table, delta: int) -> None:
+        """
+        Count rows the session's transaction inserted (positive) or deleted
+        (negative). The change is held on the session and applied only if
+        the transaction commits.
+        """
+        if not db.in_transaction():
+            self._apply([(self._key(db, table), delta)])
+            return
+        db.info.setdefault(PENDING_KEY, []).append((self._key(db, table), delta))
+
+    def _apply(self, deltas: List[Tuple[Tuple[str, str], int]]) -> None:
+        with self._lock:
+            for key, delta in deltas:
+                entry = self._counts.get(key)
+                if entry is not None:
+                    self._counts[key] = (max(0, entry[0] + delta), entry[1])
+
+    def invalidate(self, db: Session, table: Table) -> None:
+        """Forget the count so the next get() counts the table again."""
+        with self._lock:
+            self._counts.pop(self._key(db, table), None)
+
+
+# Create counter instance
+row_counts = RowCounts()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_changes(session: Session) -> None:
+    deltas = session.info.pop(PENDING_KEY, None)
+    if deltas:
+        row_counts._apply(deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_changes(session: Session, previous_transaction) -> None:
+    # Only a rollback of the outermost transaction drops its changes
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
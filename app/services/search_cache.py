@@ -0,0 +1,108 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+from app.core.metrics import gauge_function
+
+SEARCH_CACHE_REQUESTS = Counter(
+    "search_cache_requests_total",
+    "Vehicle search cache lookups by result",
+    ["result"]
+)
+
+SEARCH_CACHE_EVICTIONS = Counter(
+    "search_cache_evictions_total",
+    "Vehicle search cache entries dropped, by reason",
+    ["reason"]
+)
+
+SEARCH_CACHE_ENTRIES = Gauge(
+    "search_cache_entries",
+    "Vehicle search results currently cached",
+    multiprocess_mode="livesum"
+)
+
+SEARCH_CACHE_HIT_RATIO = Gauge(
+    "search_cache_hit_ratio",
+    "Fraction of vehicle search cache lookups served from the cache",
+    multiprocess_mode="liveall"
+)
+
+
+class SearchCache:
+    """
+    LRU cache of vehicle search pages with a TTL.
+
+    Every vehicle insert or delete bumps a generation counter and empties
+    the cache. A result is only stored if no mutation happened while it was
+    being computed, so a search racing a write can never cache stale rows.
+    The generation is per process: with several workers, writes made by
+    another worker are picked up when entries expire after the TTL.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        gauge_function(SEARCH_CACHE_ENTRIES, lambda: len(self._entries))
+        gauge_function(SEARCH_CACHE_HIT_RATIO, self.hit_ratio)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def hit_ratio(self) -> float:
+        lookups = self._hits + self._misses
+        return self._hits / lookups if lookups else 0.0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None."""
+        if settings.SEARCH_CACHE_SIZE <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[key]
+                SEARCH_CACHE_EVICTIONS.labels(reason="expired").inc()
+                entry = None
+            if entry is None:
+                self._misses += 1
+                SEARCH_CACHE_REQUESTS.labels(result="miss").inc()
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        SEARCH_CACHE_REQUESTS.labels(result="hit").inc()
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """
+        Cache value for key. generation is the counter read before the
+        value was computed; the value is dropped if it has moved since.
+        """
+        if settings.SEARCH_CACHE_SIZE <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (value, time.monotonic() + settings.SEARCH_CACHE_TTL_SECONDS)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.SEARCH_CACHE_SIZE:
+                self._entries.popitem(last=False)
+                SEARCH_CACHE_EVICTIONS.labels(reason="capacity").inc()
+
+    def invalidate(self) -> None:
+        """Drop every entry; called whenever the set of vehicles changes."""
+        with self._lock:
+            self._generation += 1
+            if self._entries:
+                SEARCH_CACHE_EVICTIONS.labels(reason="invalidated").inc(len(self._entries))
+                self._entries.clear()
+
+
+# Create cache instance
+search_cache = SearchCache()
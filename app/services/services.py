@@ -1,13 +1,55 @@
+import asyncio
 from datetime import datetime, timedelta
-from typing import Optional, List, Tuple
+from itertools import islice
+from threading import Lock
+from typing import Any, AsyncIterator, Optional, List, Tuple, Dict
+import time
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, select, and_, or_, func, delete, insert
 from fastapi import HTTPException, status
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
 
+from app.core.config import settings
+from app.core.database import SessionLocal
 from app.models.models import Vehicle, SystemConfig, AuditLog
+from app.models.search import (
+    vehicles_fts,
+    fts_enabled,
+    fts_phrase,
+    MIN_INDEXED_TERM_LENGTH
+)
+from app.services.plate_index import plate_index
+from app.services.events import occupancy_hub
+from app.services.occupancy_stats import occupancy_stats
+from app.services.search_cache import search_cache
+from app.services.audit_writer import audit_writer, PENDING_KEY
+from app.services.base import Page, paginate, count_total, encode_cursor, decode_cursor
+from app.services.row_counts import row_counts
+from app.services.audit_archive import audit_archive
 from app.schemas import schemas
 
+# Columns returned by listing queries. Selecting them instead of the entity
+# yields plain rows, skipping identity map bookkeeping for read-only pages.
+VEHICLE_COLUMNS = (
+    Vehicle.id,
+    Vehicle.number_plate,
+    Vehicle.contact_name,
+    Vehicle.phone_number,
+    Vehicle.entry_timestamp
+)
+
+AUDIT_LOG_COLUMNS = (
+    AuditLog.id,
+    AuditLog.action,
+    AuditLog.entity,
+    AuditLog.entity_id,
+    AuditLog.details,
+    AuditLog.timestamp
+)
+
 
 class VehicleService:
     """Service for managing vehicles."""
@@ -38,8 +80,13 @@ class VehicleService:
                 f"Vehicle {vehicle.number_plate} registered"
             )
             
+            row_counts.adjust(db, Vehicle.__table__, 1)
             db.commit()
             db.refresh(vehicle)
+            plate_index.add(vehicle)
+            search_cache.invalidate()
+            occupancy_stats.entered([vehicle])
+            occupancy_hub.entered([vehicle])
             return vehicle
             
         except IntegrityError:
@@ -55,6 +102,108 @@ class VehicleService:
                 detail=str(e)
             )
     
+    def bulk_create_vehicles(
+        self,
+        db: Session,
+        vehicles_in: List[schemas.VehicleCreate]
+    ) -> Tuple[List[Vehicle], List[dict]]:
+        """
+        Register many vehicles in one transaction.
+        Vehicles and their audit rows are written with one multi-row INSERT
+        each. Duplicate number plates (within the batch or already parked)
+        are reported per item instead of aborting the batch.
+        Returns tuple of (created vehicles, conflicts).
+        """
+        conflicts = []
+        pending = {}
+        for index, vehicle_in in enumerate(vehicles_in):
+            if vehicle_in.number_plate in pending:
+                conflicts.append({
+                    "index": index,
+                    "number_plate": vehicle_in.number_plate,
+                    "detail": "Duplicate number plate in request"
+                })
+            else:
+                pending[vehicle_in.number_plate] = index
+        
+        if not pending:
+            return [], conflicts
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                "number_plate": vehicles_in[index].number_plate,
+                "contact_name": vehicles_in[index].contact_name,
+                "phone_number": vehicles_in[index].phone_number,
+                "entry_timestamp": now
+            }
+            for index in pending.values()
+        ]
+        
+        try:
+            dialect = db.get_bind().dialect.name
+            if dialect == "sqlite":
+                stmt = sqlite_insert(Vehicle).on_conflict_do_nothing(
+                    index_elements=["number_plate"]
+                )
+            elif dialect == "postgresql":
+                stmt = postgresql_insert(Vehicle).on_conflict_do_nothing(
+                    index_elements=["number_plate"]
+                )
+            else:
+                existing = set(db.scalars(
+                    select(Vehicle.number_plate)
+                    .where(Vehicle.number_plate.in_(list(pending)))
+                ))
+                rows = [row for row in rows if row["number_plate"] not in existing]
+                stmt = insert(Vehicle)
+            
+            created = db.scalars(stmt.returning(Vehicle), rows).all() if rows else []
+            
+            if created:
+                AuditLogService.log_actions(db, [
+                    {
+                        "action": "CREATE",
+                        "entity": "Vehicle",
+                        "entity_id": str(vehicle.id),
+                        "details": f"Vehicle {vehicle.number_plate} registered",
+                        "timestamp": now
+                    }
+                    for vehicle in created
+                ])
+                # Detach so commit doesn't expire them (one SELECT per row)
+                for vehicle in created:
+                    db.expunge(vehicle)
+            row_counts.adjust(db, Vehicle.__table__, len(created))
+            db.commit()
+            
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        created_plates = {vehicle.number_plate for vehicle in created}
+        for number_plate, index in pending.items():
+            if number_plate not in created_plates:
+                conflicts.append({
+                    "index": index,
+                    "number_plate": number_plate,
+                    "detail": f"Vehicle with number plate {number_plate} already exists"
+                })
+        conflicts.sort(key=lambda conflict: conflict["index"])
+        
+        # Keep request order in the response
+        created = sorted(created, key=lambda vehicle: pending[vehicle.number_plate])
+        plate_index.add_many(created)
+        if created:
+            search_cache.invalidate()
+        occupancy_stats.entered(created)
+        occupancy_hub.entered(created)
+        
+        return created, conflicts
+    
     def remove_vehicle(self, db: Session, number_plate: str) -> Vehicle:
         """Remove a vehicle by number plate."""
         vehicle = self.get_by_number_plate(db, number_plate)
@@ -77,7 +226,12 @@ class VehicleService:
                 f"Vehicle {vehicle.number_plate} removed"
             )
             
+            row_counts.adjust(db, Vehicle.__table__, -1)
             db.commit()
+            plate_index.remove(vehicle.number_plate)
+            search_cache.invalidate()
+            occupancy_stats.exited(1, "removed")
+            occupancy_hub.exited([vehicle.number_plate], "removed")
             return vehicle
             
         except Exception as e:
@@ -92,20 +246,61 @@ class VehicleService:
         db: Session,
         search_term: str,
         skip: int = 0,
-        limit: int = 50
-    ) -> Tuple[List[Vehicle], int]:
-        """Search vehicles by number plate or contact name."""
-        query = db.query(Vehicle).filter(
-            or_(
-                Vehicle.number_plate.ilike(f"%{search_term}%"),
-                Vehicle.contact_name.ilike(f"%{search_term}%")
-            )
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact"
+    ) -> Page:
+        """
+        Search vehicles by number plate or contact name, newest first.
+        Uses the FTS5 trigram index on SQLite when the term is long enough;
+        otherwise falls back to ILIKE (served by pg_trgm on PostgreSQL).
+        Passing a cursor switches to keyset pagination and skips the count.
+        Pages are cached per database, case-folded term, skip, limit and
+        cursor until the next vehicle insert or delete.
+        """
+        cache_key = (
+            str(db.get_bind().engine.url),
+            search_term.casefold(),
+            skip,
+            limit,
+            cursor,
+            total_mode
         )
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        generation = search_cache.generation
+        
+        if (
+            len(search_term) >= MIN_INDEXED_TERM_LENGTH and
+            fts_enabled(db.connection())
+        ):
+            matches = select(vehicles_fts.c.rowid).where(
+                vehicles_fts.c.vehicles_fts.match(fts_phrase(search_term))
+            )
+            query = db.query(*VEHICLE_COLUMNS).filter(Vehicle.id.in_(matches))
+        else:
+            query = db.query(*VEHICLE_COLUMNS).filter(
+                or_(
+                    Vehicle.number_plate.ilike(f"%{search_term}%"),
+                    Vehicle.contact_name.ilike(f"%{search_term}%")
+                )
+            )
         
-        total = query.count()
-        vehicles = query.offset(skip).limit(limit).all()
+        # Matches have no maintained count, so estimates are exact here
+        total = None if cursor else count_total(query, total_mode)
+        vehicles, next_cursor = paginate(
+            query,
+            Vehicle.entry_timestamp,
+            Vehicle.id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor
+        )
         
-        return vehicles, total
+        page = Page(vehicles, total, next_cursor, next_cursor is not None)
+        search_cache.put(cache_key, page, generation)
+        return page
     
     def list(
         self,
@@ -113,47 +308,115 @@ class VehicleService:
         skip: int = 0,
         limit: int = 50,
         order_by: str = "entry_timestamp",
-        order: str = "desc"
-    ) -> Tuple[List[Vehicle], int]:
-        """List vehicles with pagination."""
-        query = db.query(Vehicle)
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        total_mode: str = "exact"
+    ) -> Page:
+        """
+        List vehicles with pagination.
+        When ordered by entry_timestamp, pages carry a keyset cursor; passing
+        it back fetches the next page without an offset scan or a count.
+        total_mode "estimate" reports the maintained vehicle count and "none"
+        skips the count. Items are read-only rows, not Vehicle instances.
+        """
+        query = db.query(*VEHICLE_COLUMNS)
+        descending = order.lower() == "desc"
+        total = None if cursor else count_total(
+            query,
+            total_mode,
+            lambda: row_counts.get(db, Vehicle.__table__)
+        )
+        
+        if order_by == "entry_timestamp":
+            vehicles, next_cursor = paginate(
+                query,
+                Vehicle.entry_timestamp,
+                Vehicle.id,
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+                descending=descending
+            )
+            return Page(vehicles, total, next_cursor, next_cursor is not None)
+        
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination requires order_by=entry_timestamp"
+            )
         
         # Apply ordering
-        if order.lower() == "desc":
+        if descending:
             query = query.order_by(getattr(Vehicle, order_by).desc())
         else:
             query = query.order_by(getattr(Vehicle, order_by).asc())
         
-        total = query.count()
-        vehicles = query.offset(skip).limit(limit).all()
+        # One extra row tells us whether another page exists
+        vehicles = query.offset(skip).limit(limit + 1).all()
         
-        return vehicles, total
+        return Page(vehicles[:limit], total, None, len(vehicles) > limit)
     
-    def cleanup_expired_vehicles(self, db: Session) -> int:
-        """Remove vehicles that have exceeded retention period."""
-        config = SystemConfigService().get_config(db)
+    def cleanup_expired_vehicles(
+        self,
+        db: Session,
+        batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Remove vehicles that have exceeded retention period.
+        Rows are purged in bounded, set-based batches (one DELETE ... RETURNING
+        and one bulk audit INSERT per batch), committing after each batch so
+        the write lock is released between them.
+        """
+        config = config_service.get_cached_config(db)
         retention_hours = config.retention_hours
+        batch_size = batch_size or settings.CLEANUP_BATCH_SIZE
         
         cutoff_time = datetime.utcnow() - timedelta(hours=retention_hours)
-        query = db.query(Vehicle).filter(Vehicle.entry_timestamp < cutoff_time)
-        
-        vehicles = query.all()
         count = 0
         
         try:
-            for vehicle in vehicles:
-                db.delete(vehicle)
-                count += 1
+            while True:
+                batch = (
+                    select(Vehicle.id)
+                    .where(Vehicle.entry_timestamp < cutoff_time)
+                    .order_by(Vehicle.entry_timestamp)
+                    .limit(batch_size)
+                )
+                removed = db.execute(
+                    delete(Vehicle)
+                    .where(Vehicle.id.in_(batch))
+                    .returning(Vehicle.id, Vehicle.number_plate)
+                    .execution_options(synchronize_session=False)
+                ).all()
+                if not removed:
+                    break
+                
+                now = datetime.utcnow()
+                AuditLogService.log_actions(db, [
+                    {
+                        "action": "DELETE",
+                        "entity": "Vehicle",
+                        "entity_id": str(vehicle_id),
+                        "details": f"Vehicle {number_plate} removed due to retention policy",
+                        "timestamp": now
+                    }
+                    for vehicle_id, number_plate in removed
+                ])
+                row_counts.adjust(db, Vehicle.__table__, -len(removed))
+                db.commit()
                 
-                AuditLogService.log_action(
-                    db,
-                    "DELETE",
-                    "Vehicle",
-                    str(vehicle.id),
-                    f"Vehicle {vehicle.number_plate} removed due to retention policy"
+                for _, number_plate in removed:
+                    plate_index.remove(number_plate)
+                search_cache.invalidate()
+                occupancy_stats.exited(len(removed), "expired", now)
+                occupancy_hub.exited(
+                    (number_plate for _, number_plate in removed), "expired"
                 )
+                count += len(removed)
+                
+                if len(removed) < batch_size:
+                    break
             
-            db.commit()
             return count
             
         except Exception as e:
@@ -162,10 +425,141 @@ class VehicleService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=str(e)
             )
+    
+    # Awaitable variants for request handlers using an AsyncSession
+    
+    async def aget_by_number_plate(
+        self,
+        db: AsyncSession,
+        number_plate: str
+    ) -> Optional[Vehicle]:
+        """Get vehicle by number plate."""
+        return await db.run_sync(self.get_by_number_plate, number_plate)
+    
+    async def acreate_vehicle(
+        self,
+        db: AsyncSession,
+        vehicle_in: schemas.VehicleCreate
+    ) -> Vehicle:
+        """Create a new vehicle entry with validation."""
+        return await db.run_sync(self.create_vehicle, vehicle_in)
+    
+    async def abulk_create_vehicles(
+        self,
+        db: AsyncSession,
+        vehicles_in: List[schemas.VehicleCreate]
+    ) -> Tuple[List[Vehicle], List[dict]]:
+        """Register many vehicles in one transaction."""
+        return await db.run_sync(self.bulk_create_vehicles, vehicles_in)
+    
+    async def aremove_vehicle(self, db: AsyncSession, number_plate: str) -> Vehicle:
+        """Remove a vehicle by number plate."""
+        return await db.run_sync(self.remove_vehicle, number_plate)
+    
+    async def asearch_vehicles(
+        self,
+        db: AsyncSession,
+        search_term: str,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact"
+    ) -> Page:
+        """Search vehicles by number plate or contact name."""
+        return await db.run_sync(
+            self.search_vehicles, search_term, skip, limit, cursor, total_mode
+        )
+    
+    async def alist(
+        self,
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 50,
+        order_by: str = "entry_timestamp",
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        total_mode: str = "exact"
+    ) -> Page:
+        """List vehicles with pagination."""
+        return await db.run_sync(
+            self.list, skip, limit, order_by, order, cursor, total_mode
+        )
+    
+    async def acleanup_expired_vehicles(
+        self,
+        db: AsyncSession,
+        batch_size: Optional[int] = None
+    ) -> int:
+        """Remove vehicles that have exceeded retention period."""
+        return await db.run_sync(self.cleanup_expired_vehicles, batch_size)
+    
+    async def astream(self, db: AsyncSession) -> AsyncIterator[Row]:
+        """
+        Stream every active vehicle, oldest first, for export.
+        Rows come from a server-side cursor EXPORT_BATCH_SIZE at a time and
+        bypass the identity map, so memory stays flat however many there are.
+        """
+        result = await db.stream(
+            select(*VEHICLE_COLUMNS)
+            .order_by(Vehicle.entry_timestamp, Vehicle.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        async for row in result:
+            yield row
 
 
 class SystemConfigService:
-    """Service for managing system configuration."""
+    """
+    Service for managing system configuration.
+    
+    Read paths use get_cached_config, which serves a detached snapshot of
+    the config row for up to CONFIG_CACHE_TTL_SECONDS. Writes through this
+    service invalidate it immediately; other worker processes pick up the
+    change when their snapshot expires.
+    """
+    
+    def __init__(self):
+        self._lock = Lock()
+        self._version = 0
+        # Database URL -> (snapshot, cache version, loaded at)
+        self._cache: Dict[str, Tuple[SystemConfig, int, float]] = {}
+    
+    def invalidate(self) -> None:
+        """Drop cached configuration after it has been changed."""
+        with self._lock:
+            self._version += 1
+            self._cache.clear()
+    
+    def _cached(self, url: str) -> Optional[SystemConfig]:
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+        snapshot, version, loaded_at = entry
+        if (
+            version != self._version or
+            time.monotonic() - loaded_at > settings.CONFIG_CACHE_TTL_SECONDS
+        ):
+            return None
+        return snapshot
+    
+    def get_cached_config(self, db: Session) -> SystemConfig:
+        """
+        Get current system configuration from the process cache.
+        The returned object is detached and must not be modified.
+        """
+        url = str(db.get_bind().engine.url)
+        snapshot = self._cached(url)
+        if snapshot is not None:
+            return snapshot
+        
+        version = self._version
+        config = self.get_config(db)
+        snapshot = SystemConfig(id=config.id, retention_hours=config.retention_hours)
+        with self._lock:
+            # Don't store a value read before a concurrent invalidation
+            if version == self._version:
+                self._cache[url] = (snapshot, version, time.monotonic())
+        return snapshot
     
     def get_config(self, db: Session) -> SystemConfig:
         """Get current system configuration."""
@@ -197,6 +591,7 @@ class SystemConfigService:
             )
             
             db.commit()
+            self.invalidate()
             db.refresh(config)
             return config
             
@@ -206,6 +601,27 @@ class SystemConfigService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=str(e)
             )
+    
+    # Awaitable variants for request handlers using an AsyncSession
+    
+    async def aget_config(self, db: AsyncSession) -> SystemConfig:
+        """Get current system configuration."""
+        return await db.run_sync(self.get_config)
+    
+    async def aget_cached_config(self, db: AsyncSession) -> SystemConfig:
+        """Get current system configuration from the process cache."""
+        snapshot = self._cached(str(db.bind.url))
+        if snapshot is not None:
+            return snapshot
+        return await db.run_sync(self.get_cached_config)
+    
+    async def aupdate_retention_period(
+        self,
+        db: AsyncSession,
+        retention_hours: int
+    ) -> SystemConfig:
+        """Update data retention period."""
+        return await db.run_sync(self.update_retention_period, retention_hours)
 
 
 class AuditLogService:
@@ -219,7 +635,12 @@ class AuditLogService:
         entity_id: str,
         details: Optional[str] = None
     ) -> AuditLog:
-        """Create an audit log entry."""
+        """
+        Create an audit log entry.
+        In async audit mode the entry is queued when the caller's transaction
+        commits and written later by the background writer; a full queue
+        falls back to the transactional write.
+        """
         log = AuditLog(
             action=action,
             entity=entity,
@@ -227,10 +648,38 @@ class AuditLogService:
             details=details,
             timestamp=datetime.utcnow()
         )
+        if settings.AUDIT_MODE == "async" and not audit_writer.is_full():
+            db.info.setdefault(PENDING_KEY, []).append({
+                "action": action,
+                "entity": entity,
+                "entity_id": entity_id,
+                "details": details,
+                "timestamp": log.timestamp.isoformat()
+            })
+            return log
         db.add(log)
         db.flush()  # Flush but don't commit, let the caller handle the transaction
+        row_counts.adjust(db, AuditLog.__table__, 1)
         return log
     
+    @staticmethod
+    def log_actions(db: Session, entries: List[dict]) -> None:
+        """
+        Create many audit log entries with a single INSERT.
+        Entries carry the AuditLog columns; async audit mode queues them
+        like log_action does.
+        """
+        if not entries:
+            return
+        if settings.AUDIT_MODE == "async" and not audit_writer.is_full():
+            db.info.setdefault(PENDING_KEY, []).extend(
+                {**entry, "timestamp": entry["timestamp"].isoformat()}
+                for entry in entries
+            )
+            return
+        db.execute(insert(AuditLog), entries)
+        row_counts.adjust(db, AuditLog.__table__, len(entries))
+    
     def get_logs(
         self,
         db: Session,
@@ -239,10 +688,18 @@ class AuditLogService:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         skip: int = 0,
-        limit: int = 50
-    ) -> Tuple[List[AuditLog], int]:
-        """Get audit logs with filtering and pagination."""
-        query = db.query(AuditLog)
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact"
+    ) -> Page:
+        """
+        Get audit logs with filtering and pagination, newest first.
+        Passing a cursor switches to keyset pagination and skips the count.
+        Rows older than the hot table are read from archive segments once a
+        page runs past the end of audit_logs. total_mode "estimate" uses the
+        maintained row count when no filter is given.
+        """
+        query = db.query(*AUDIT_LOG_COLUMNS)
         
         if entity:
             query = query.filter(AuditLog.entity == entity)
@@ -251,12 +708,140 @@ class AuditLogService:
         if end_date:
             query = query.filter(AuditLog.timestamp <= end_date)
         
-        query = query.order_by(AuditLog.timestamp.desc())
+        total = None
+        if not cursor:
+            filtered = entity or start_date or end_date
+            total = count_total(
+                query,
+                total_mode,
+                None if filtered else lambda: row_counts.get(db, AuditLog.__table__)
+            )
+            if total is not None:
+                total += audit_archive.count(entity, start_date, end_date)
+        
+        logs, next_cursor = paginate(
+            query,
+            AuditLog.timestamp,
+            AuditLog.id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor
+        )
+        
+        # Archived rows are all older than the hot ones, so they only
+        # matter once the hot rows run out
+        if next_cursor is None and audit_archive.covers(start_date, end_date):
+            archive_skip = 0
+            if logs:
+                before = (logs[-1].timestamp, logs[-1].id)
+            elif cursor:
+                before = decode_cursor(cursor)
+            else:
+                # The page starts past the last hot row
+                before = None
+                archive_skip = max(0, skip - query.count())
+            archived = list(islice(
+                audit_archive.scan(entity, start_date, end_date, before),
+                archive_skip,
+                archive_skip + limit - len(logs) + 1
+            ))
+            logs = list(logs) + archived
+            if len(logs) > limit:
+                logs = logs[:limit]
+                next_cursor = encode_cursor(logs[-1].timestamp, logs[-1].id)
+        
+        return Page(logs, total, next_cursor, next_cursor is not None)
+    
+    def archive_logs(self, db: Session, older_than_days: Optional[int] = None) -> int:
+        """
+        Move audit logs older than the hot window into archive segments.
+        The window is AUDIT_ARCHIVE_AFTER_DAYS whole days; 0 disables it.
+        """
+        days = settings.AUDIT_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        if days <= 0:
+            return 0
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        return audit_archive.archive(db, today - timedelta(days=days))
+    
+    # Awaitable variants for request handlers using an AsyncSession
+    
+    @staticmethod
+    async def alog_action(
+        db: AsyncSession,
+        action: str,
+        entity: str,
+        entity_id: str,
+        details: Optional[str] = None
+    ) -> AuditLog:
+        """Create an audit log entry."""
+        return await db.run_sync(
+            AuditLogService.log_action, action, entity, entity_id, details
+        )
+    
+    async def aget_logs(self, db: AsyncSession, **filters) -> Page:
+        """
+        Get audit logs with filtering and pagination.
+        When archived days overlap the range, segments may be decompressed,
+        so the query runs in a worker thread on its own session instead.
+        """
+        if not audit_archive.covers(filters.get("start_date"), filters.get("end_date")):
+            return await db.run_sync(self.get_logs, **filters)
+
+        def get_logs() -> Page:
+            with SessionLocal() as thread_db:
+                return self.get_logs(thread_db, **filters)
+
+        return await asyncio.to_thread(get_logs)
+    
+    async def astream_logs(
+        self,
+        db: AsyncSession,
+        *,
+        entity: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Stream audit logs matching the get_logs filters, newest first.
+        The hot table is read through a server-side cursor, then archive
+        segments are read in a worker thread EXPORT_BATCH_SIZE rows at a time.
+        """
+        query = select(*AUDIT_LOG_COLUMNS)
+        if entity:
+            query = query.where(AuditLog.entity == entity)
+        if start_date:
+            query = query.where(AuditLog.timestamp >= start_date)
+        if end_date:
+            query = query.where(AuditLog.timestamp <= end_date)
         
-        total = query.count()
-        logs = query.offset(skip).limit(limit).all()
+        result = await db.stream(
+            query
+            .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        async for row in result:
+            yield row
         
-        return logs, total
+        archived = audit_archive.scan(entity, start_date, end_date)
+        while True:
+            batch = await asyncio.to_thread(
+                lambda: list(islice(archived, settings.EXPORT_BATCH_SIZE))
+            )
+            if not batch:
+                break
+            for row in batch:
+                yield row
+    
+    async def aarchive_logs(self, older_than_days: Optional[int] = None) -> int:
+        """
+        Move audit logs older than the hot window into archive segments,
+        in a worker thread on its own session.
+        """
+        def archive_logs() -> int:
+            with SessionLocal() as db:
+                return self.archive_logs(db, older_than_days)
+
+        return await asyncio.to_thread(archive_logs)
 
 
 # Create service instances
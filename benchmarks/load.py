@@ -0,0 +1,409 @@
+"""
+Throughput and latency of the API under concurrent load.
+
+Seeds a scratch SQLite database with benchmarks.datagen, serves the
+real app (middlewares and lifespan included) with uvicorn on a thread of
+this process, and drives create, get, search, list, delete, audit and
+WebSocket search from concurrent clients until the duration elapses. The
+clients share the interpreter with the server, so absolute numbers are
+lower than against a separate server; compare reports taken the same way.
+
+With --mode service the same operations call the service layer directly,
+one at a time, without HTTP or the event loop.
+
+Throughput and p50/p95/p99 per operation are written to --output as JSON.
+Pass a report from another commit as --baseline to print the change.
+
+Usage:
+    python -m benchmarks.load --vehicles 10000 --audit-rows 50000 --concurrency 32 --duration 20 --output bench.json
+    python -m benchmarks.load --mode service --requests 2000 --baseline bench-main.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+OPERATIONS = ("create", "get", "search", "list", "delete", "audit", "ws_search")
+
+API_KEY = "benchmark-key"
+
+
+def configure(directory: str, args: argparse.Namespace) -> str:
+    """
+    Point the settings at a scratch directory. Must run before anything
+    under app/ is imported, since settings and engines are built on import.
+    """
+    url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ.update({
+        "SQLALCHEMY_DATABASE_URL": url,
+        "SECRET_KEY": API_KEY,
+        "TESTING": "false",
+        "RATE_LIMIT_PER_MINUTE": str(10 ** 9),
+        "METRICS_PORT": "0",
+        "MAX_WEBSOCKET_CONNECTIONS": str(max(args.concurrency * 2, 100)),
+        "AUDIT_MODE": args.audit_mode,
+        "AUDIT_SPOOL_PATH": os.path.join(directory, "audit_spool.jsonl"),
+        "AUDIT_ARCHIVE_DIR": os.path.join(directory, "audit_archive"),
+    })
+    return url
+
+
+def seed(url: str, vehicles: int, audit_rows: int) -> List[str]:
+    """Load a generated lot and return a sample of its plates to query."""
+    from sqlalchemy import create_engine, func, select
+    from app.models.models import Vehicle
+    from benchmarks.datagen import generate
+
+    generate(url, vehicles, audit_rows, seed=0)
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        plates = list(conn.scalars(
+            select(Vehicle.number_plate).order_by(func.random()).limit(1000)
+        ))
+    engine.dispose()
+    return plates
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, int(round(p / 100 * len(values))) - 1))
+    return values[rank]
+
+
+def summarize(
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+    elapsed: float
+) -> Dict[str, Dict[str, float]]:
+    report = {}
+    for op, values in latencies.items():
+        values = sorted(values)
+        report[op] = {
+            "count": len(values),
+            "errors": errors.get(op, 0),
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+        }
+    return report
+
+
+class Recorder:
+    """Latencies and error counts per operation."""
+    def __init__(self, operations):
+        self.latencies: Dict[str, List[float]] = {op: [] for op in operations}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, op: str, started: float, ok: bool) -> None:
+        if ok:
+            self.latencies[op].append(time.perf_counter() - started)
+        else:
+            self.errors[op] = self.errors.get(op, 0) + 1
+
+
+# HTTP mode
+
+class BenchServer:
+    """uvicorn serving the app on a daemon thread with its own event loop."""
+    def __init__(self, app):
+        import uvicorn
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+
+        class Server(uvicorn.Server):
+            def install_signal_handlers(self):
+                pass  # Not on the main thread
+
+        self.server = Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="on"
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> "BenchServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def client_worker(
+    worker: int,
+    base_url: str,
+    operations: List[str],
+    plates: List[str],
+    vehicles: int,
+    deadline: float,
+    recorder: Recorder
+) -> None:
+    import httpx
+    import websockets
+
+    rng = random.Random(worker)
+    headers = {"X-API-Key": API_KEY}
+    created: List[str] = []
+    counter = itertools.count()
+    ws_url = base_url.replace("http", "ws", 1) + f"/ws/vehicles/search?api_key={API_KEY}"
+
+    def seeded_plate() -> str:
+        return rng.choice(plates)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30) as client:
+        websocket = None
+        if "ws_search" in operations:
+            websocket = await websockets.connect(ws_url)
+        try:
+            for op in itertools.cycle(operations):
+                if time.perf_counter() >= deadline:
+                    break
+                started = time.perf_counter()
+                if op == "create":
+                    plate = f"LOAD{worker:04d}{next(counter):08d}"
+                    response = await client.post("/api/v1/vehicles", json={
+                        "number_plate": plate,
+                        "contact_name": f"Load User {worker}",
+                        "phone_number": "+1234567890"
+                    })
+                    if response.status_code == 201:
+                        created.append(plate)
+                    recorder.record(op, started, response.status_code == 201)
+                elif op == "delete":
+                    if not created:
+                        continue
+                    response = await client.delete(f"/api/v1/vehicles/{created.pop()}")
+                    recorder.record(op, started, response.is_success)
+                elif op == "get":
+                    response = await client.get(f"/api/v1/vehicles/{seeded_plate()}")
+                    recorder.record(op, started, response.is_success)
+                elif op == "search":
+                    term = seeded_plate()[:rng.randint(4, 6)]
+                    response = await client.get(
+                        f"/api/v1/vehicles/search/{term}", params={"limit": 20}
+                    )
+                    recorder.record(op, started, response.is_success)
+                elif op == "list":
+                    response = await client.get("/api/v1/vehicles", params={
+                        "skip": rng.randrange(max(vehicles - 50, 1)), "limit": 50
+                    })
+                    recorder.record(op, started, response.is_success)
+                elif op == "audit":
+                    response = await client.get("/api/v1/audit", params={
+                        "page": rng.randint(1, 20), "per_page": 50
+                    })
+                    recorder.record(op, started, response.is_success)
+                elif op == "ws_search":
+                    request_id = next(counter)
+                    await websocket.send(json.dumps({
+                        "type": "search",
+                        "search_term": seeded_plate()[:rng.randint(4, 6)],
+                        "request_id": request_id
+                    }))
+                    while True:
+                        reply = json.loads(await websocket.recv())
+                        if reply.get("request_id") == request_id:
+                            break
+                    recorder.record(op, started, reply["type"] == "search_results")
+        finally:
+            if websocket is not None:
+                await websocket.close()
+
+
+async def drive(
+    base_url: str,
+    operations: List[str],
+    plates: List[str],
+    args: argparse.Namespace,
+    recorder: Recorder
+) -> float:
+    # Warm up connections, caches and the plate index
+    await client_worker(-1, base_url, operations, plates, args.vehicles,
+                        time.perf_counter() + args.warmup, Recorder(operations))
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        client_worker(worker, base_url, operations, plates, args.vehicles, deadline, recorder)
+        for worker in range(args.concurrency)
+    ))
+    return time.perf_counter() - started
+
+
+def run_http(
+    args: argparse.Namespace,
+    operations: List[str],
+    plates: List[str]
+) -> Dict[str, Dict[str, float]]:
+    from app.main import app
+
+    recorder = Recorder(operations)
+    with BenchServer(app) as server:
+        elapsed = asyncio.run(drive(
+            f"http://127.0.0.1:{server.port}", operations, plates, args, recorder
+        ))
+    return summarize(recorder.latencies, recorder.errors, elapsed)
+
+
+# Service mode
+
+def run_service(
+    args: argparse.Namespace,
+    operations: List[str],
+    plates: List[str]
+) -> Dict[str, Dict[str, float]]:
+    from fastapi import HTTPException
+    from app.core.database import engine, SessionLocal
+    from app.schemas import schemas
+    from app.services.plate_index import plate_index
+    from app.services.services import audit_log_service, vehicle_service
+
+    rng = random.Random(0)
+    recorder = Recorder(operations)
+    created: List[str] = []
+    counter = itertools.count()
+
+    def seeded_plate() -> str:
+        return rng.choice(plates)
+
+    calls: Dict[str, Callable] = {
+        "create": lambda db: created.append(vehicle_service.create_vehicle(
+            db, schemas.VehicleCreate(
+                number_plate=f"LOAD{next(counter):08d}",
+                contact_name="Load User",
+                phone_number="+1234567890"
+            )
+        ).number_plate),
+        "delete": lambda db: vehicle_service.remove_vehicle(db, created.pop()),
+        "get": lambda db: vehicle_service.get_by_number_plate(db, seeded_plate()),
+        "search": lambda db: vehicle_service.search_vehicles(
+            db, seeded_plate()[:rng.randint(4, 6)], limit=20
+        ),
+        "list": lambda db: vehicle_service.list(
+            db, skip=rng.randrange(max(args.vehicles - 50, 1)), limit=50
+        ),
+        "audit": lambda db: audit_log_service.get_logs(
+            db, skip=rng.randrange(20) * 50, limit=50
+        ),
+        "ws_search": lambda db: plate_index.search(seeded_plate()[:rng.randint(4, 6)], 10),
+    }
+
+    with SessionLocal() as db:
+        plate_index.rebuild(db)
+        started = time.perf_counter()
+        for op in operations:
+            for _ in range(args.requests):
+                if op == "delete" and not created:
+                    break
+                call_started = time.perf_counter()
+                try:
+                    calls[op](db)
+                    recorder.record(op, call_started, True)
+                except HTTPException:
+                    recorder.record(op, call_started, False)
+        elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    # Operations ran one after another: report each against its own time
+    report = summarize(recorder.latencies, recorder.errors, elapsed)
+    for op, values in recorder.latencies.items():
+        busy = sum(values)
+        report[op]["throughput_rps"] = round(len(values) / busy, 2) if busy else 0.0
+    return report
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: Dict, baseline: Optional[Dict]) -> None:
+    print(f"{'operation':10} {'count':>7} {'err':>5} {'req/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for op, stats in report["operations"].items():
+        line = (
+            f"{op:10} {stats['count']:7d} {stats['errors']:5d} "
+            f"{stats['throughput_rps']:9.1f} {stats['p50_ms']:8.2f} "
+            f"{stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f}"
+        )
+        before = (baseline or {}).get("operations", {}).get(op)
+        if before and before["throughput_rps"] and before["p95_ms"]:
+            rps = stats["throughput_rps"] / before["throughput_rps"] - 1
+            p95 = stats["p95_ms"] / before["p95_ms"] - 1
+            line += f"   req/s {rps:+7.1%}  p95 {p95:+7.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=("http", "service"), default="http")
+    parser.add_argument("--vehicles", type=int, default=10000)
+    parser.add_argument("--audit-rows", type=int, default=50000)
+    parser.add_argument("--operations", default=",".join(OPERATIONS),
+                        help="Comma-separated subset of " + ", ".join(OPERATIONS))
+    parser.add_argument("--concurrency", type=int, default=16, help="HTTP mode clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="HTTP mode seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="HTTP mode seconds")
+    parser.add_argument("--requests", type=int, default=1000,
+                        help="Service mode calls per operation")
+    parser.add_argument("--audit-mode", choices=("strict", "async"), default="strict")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    operations = [op.strip() for op in args.operations.split(",") if op.strip()]
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = configure(tmp, args)
+        plates = seed(url, args.vehicles, args.audit_rows)
+        run = run_http if args.mode == "http" else run_service
+        results = run(args, operations, plates)
+
+    report = {
+        "mode": args.mode,
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            key: value for key, value in vars(args).items()
+            if key not in ("output", "baseline")
+        },
+        "operations": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
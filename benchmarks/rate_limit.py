@@ -0,0 +1,81 @@
+"""
+Micro-benchmark of check_rate_limit overhead per request.
+
+Compares the previous list-of-timestamps limiter with the sliding-window
+counter on the in-process and shared-memory backends. Each key is driven
+close to its limit so the legacy implementation holds a full minute of
+timestamps, which is its steady state under load.
+
+Usage:
+    python -m benchmarks.rate_limit --calls 200000 --keys 10
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+from app.api import deps
+from app.core.rate_limit import RateLimiter, MemoryBackend, SharedMemoryBackend
+
+
+class LegacyRateLimiter:
+    """The list-based limiter this module replaced, kept for comparison."""
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.requests = {}
+
+    def is_allowed(self, key: str) -> bool:
+        now = datetime.utcnow()
+        if key not in self.requests:
+            self.requests[key] = []
+        self.requests[key] = [
+            ts for ts in self.requests[key]
+            if now - ts < timedelta(minutes=1)
+        ]
+        if len(self.requests[key]) >= self.limit:
+            return False
+        self.requests[key].append(now)
+        return True
+
+
+async def drive(calls: int, keys: list) -> float:
+    """Seconds spent in check_rate_limit for the given number of calls."""
+    start = time.perf_counter()
+    for i in range(calls):
+        try:
+            await deps.check_rate_limit(keys[i % len(keys)])
+        except HTTPException:
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    shm_name = f"parking_bench_{uuid.uuid4().hex[:8]}"
+    shared = SharedMemoryBackend(shm_name, slots=4096)
+    limiters = {
+        "legacy list": LegacyRateLimiter(args.limit),
+        "sliding/memory": RateLimiter(args.limit, backend=MemoryBackend()),
+        "sliding/shared": RateLimiter(args.limit, backend=shared),
+    }
+    keys = [f"key-{i}" for i in range(args.keys)]
+
+    try:
+        for name, limiter in limiters.items():
+            deps.rate_limiter = limiter
+            elapsed = asyncio.run(drive(args.calls, keys))
+            print(f"{name:15} {elapsed / args.calls * 1e6:7.2f} us/call")
+    finally:
+        shared.close(unlink=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Per-request CPU cost of the vehicle and audit list endpoints.
+
+Serves the same page two ways from a scratch database: the previous path
+(ORM entities returned through response_model, validated and re-encoded by
+FastAPI) and the current one (column rows encoded by list_response). Each
+request goes through a TestClient, so routing and HTTP overhead are
+included equally in both.
+
+Usage:
+    python -m benchmarks.serialization --rows 5000 --page-size 100 --requests 500
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.api.responses import list_response
+from app.models.base import Base
+from app.models.models import AuditLog, Vehicle
+from app.schemas import schemas
+from app.schemas.base import Pagination
+from app.services.services import AUDIT_LOG_COLUMNS, VEHICLE_COLUMNS
+
+
+def seed(Session, rows: int) -> None:
+    now = datetime.utcnow()
+    with Session() as db:
+        db.execute(insert(Vehicle), [
+            {
+                "number_plate": f"BENCH{i:07d}",
+                "contact_name": f"Bench User {i}",
+                "phone_number": "+1234567890",
+                "entry_timestamp": now - timedelta(seconds=i)
+            }
+            for i in range(rows)
+        ])
+        db.execute(insert(AuditLog), [
+            {
+                "action": "CREATE",
+                "entity": "Vehicle",
+                "entity_id": str(i),
+                "details": f"Vehicle BENCH{i:07d} registered",
+                "timestamp": now - timedelta(seconds=i)
+            }
+            for i in range(rows)
+        ])
+        db.commit()
+
+
+def build_app(Session, page_size: int) -> FastAPI:
+    app = FastAPI()
+
+    def page(db, columns, timestamp):
+        total = db.query(columns[0]).count()
+        query = db.query(*columns).order_by(timestamp.desc())
+        return query.limit(page_size).all(), total
+
+    @app.get("/legacy/vehicles", response_model=schemas.VehicleList)
+    def legacy_vehicles():
+        with Session() as db:
+            rows, total = page(db, (Vehicle,), Vehicle.entry_timestamp)
+            return {"items": rows, "pagination": Pagination.from_params(total, 0, page_size)}
+
+    @app.get("/fast/vehicles", response_model=schemas.VehicleList)
+    def fast_vehicles():
+        with Session() as db:
+            rows, total = page(db, VEHICLE_COLUMNS, Vehicle.entry_timestamp)
+            return list_response(
+                rows, schemas.VehicleResponse, Pagination.from_params(total, 0, page_size)
+            )
+
+    @app.get("/legacy/audit", response_model=schemas.AuditLogList)
+    def legacy_audit():
+        with Session() as db:
+            rows, total = page(db, (AuditLog,), AuditLog.timestamp)
+            return {"items": rows, "pagination": Pagination.from_params(total, 0, page_size)}
+
+    @app.get("/fast/audit", response_model=schemas.AuditLogList)
+    def fast_audit():
+        with Session() as db:
+            rows, total = page(db, AUDIT_LOG_COLUMNS, AuditLog.timestamp)
+            return list_response(
+                rows, schemas.AuditLogResponse, Pagination.from_params(total, 0, page_size)
+            )
+
+    return app
+
+
+def measure(client: TestClient, path: str, requests: int) -> float:
+    """CPU milliseconds per request."""
+    client.get(path)  # Warm up
+    start = time.process_time()
+    for _ in range(requests):
+        response = client.get(path)
+        response.raise_for_status()
+    return (time.process_time() - start) / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        seed(Session, args.rows)
+
+        with TestClient(build_app(Session, args.page_size)) as client:
+            for endpoint in ("vehicles", "audit"):
+                legacy = measure(client, f"/legacy/{endpoint}", args.requests)
+                fast = measure(client, f"/fast/{endpoint}", args.requests)
+                print(
+                    f"{endpoint:8} legacy={legacy:6.2f}ms "
+                    f"fast={fast:6.2f}ms "
+                    f"speedup={legacy / fast:4.2f}x"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
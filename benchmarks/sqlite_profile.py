@@ -0,0 +1,130 @@
+"""
+Mixed read/write benchmark for the SQLite performance profile.
+
+Runs the same workload twice against a scratch database: once with SQLite
+defaults (rollback journal, synchronous=FULL) and once with the PRAGMAs from
+app.core.database.sqlite_pragmas(). Writer threads register vehicles through
+VehicleService while reader threads page through the vehicle list.
+
+Usage:
+    python -m benchmarks.sqlite_profile --duration 10 --writers 2 --readers 4
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import sqlite_pragmas
+from app.models.base import Base
+from app.schemas.schemas import VehicleCreate
+from app.services.services import vehicle_service
+
+
+def make_engine(path: str, pragmas: list):
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=16,
+        max_overflow=0
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+def run(pragmas: list, duration: float, writers: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"), pragmas)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        stop = threading.Event()
+        writes = []
+        read_latencies = []
+        errors = []
+
+        def writer():
+            count = 0
+            db = Session()
+            try:
+                while not stop.is_set():
+                    try:
+                        vehicle_service.create_vehicle(db, VehicleCreate(
+                            number_plate=uuid.uuid4().hex[:12].upper(),
+                            contact_name="Bench User",
+                            phone_number="+1234567890"
+                        ))
+                        count += 1
+                    except Exception as e:
+                        errors.append(e)
+            finally:
+                db.close()
+                writes.append(count)
+
+        def reader():
+            latencies = []
+            db = Session()
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    vehicle_service.list(db, 0, 50)
+                    db.rollback()  # End the read transaction
+                    latencies.append(time.perf_counter() - start)
+            finally:
+                db.close()
+                read_latencies.extend(latencies)
+
+        threads = (
+            [threading.Thread(target=writer) for _ in range(writers)] +
+            [threading.Thread(target=reader) for _ in range(readers)]
+        )
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    read_latencies.sort()
+    return {
+        "writes_per_sec": sum(writes) / duration,
+        "reads": len(read_latencies),
+        "read_p50_ms": statistics.median(read_latencies) * 1000,
+        "read_p95_ms": read_latencies[int(len(read_latencies) * 0.95)] * 1000,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    for name, pragmas in (("default", []), ("profile", sqlite_pragmas())):
+        result = run(pragmas, args.duration, args.writers, args.readers)
+        print(
+            f"{name:8} writes/s={result['writes_per_sec']:8.1f} "
+            f"reads={result['reads']:6d} "
+            f"read p50={result['read_p50_ms']:6.2f}ms "
+            f"p95={result['read_p95_ms']:6.2f}ms "
+            f"errors={result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
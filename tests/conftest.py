@@ -1,36 +1,36 @@
+import os
+
+# Set testing environment before the app reads its settings, so both
+# engines are bound to the test database
+os.environ["TESTING"] = "1"
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from typing import Generator
-import os
+from typing import AsyncGenerator, Generator
 import uuid
 
 from app.core.config import settings
 from app.models.base import Base
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db, get_async_session_factory, engine, async_engine
 from app.main import app
+from app.api.deps import rate_limiter
 from app.models.models import Vehicle, SystemConfig, AuditLog
 
-# Set testing environment
-os.environ["TESTING"] = "1"
-
-# Test database URL
-SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test.db"
-
-# Create test database engine
-engine = create_engine(
-    SQLALCHEMY_TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
-
-# Create test SessionLocal
+# Test sessions share the app's engines (./test.db while TESTING is set)
 TestingSessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_env():
     """Setup test environment."""
@@ -40,8 +40,9 @@ def setup_test_env():
     os.environ["MAX_WEBSOCKET_CONNECTIONS"] = "5"
     yield
     # Cleanup
-    if os.path.exists("./test.db"):
-        os.remove("./test.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(f"./test.db{suffix}"):
+            os.remove(f"./test.db{suffix}")
 
 @pytest.fixture(scope="function")
 def db_engine():
@@ -53,10 +54,12 @@ def db_engine():
 
 @pytest.fixture(scope="function")
 def db(db_engine) -> Generator:
-    """Create a fresh database session for each test."""
-    connection = db_engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    """
+    Create a fresh database session for each test.
+    Its commits are real, so requests served through the async engine see
+    them; db_engine recreates the tables between tests.
+    """
+    session = TestingSessionLocal()
     
     # Clear all tables
     session.query(Vehicle).delete()
@@ -74,8 +77,6 @@ def db(db_engine) -> Generator:
     
     # Cleanup
     session.close()
-    transaction.rollback()
-    connection.close()
 
 @pytest.fixture(scope="function")
 def client(db) -> Generator:
@@ -86,18 +87,22 @@ def client(db) -> Generator:
         finally:
             pass
     
+    async def override_get_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_session_factory] = lambda: TestingAsyncSessionLocal
     
-    # Initialize app state for WebSocket tests
-    app.state.websocket_connections = set()
+    # Start every test with a fresh rate limit window
+    rate_limiter.reset()
     
     with TestClient(app) as test_client:
         yield test_client
     
     # Cleanup
     app.dependency_overrides.clear()
-    if hasattr(app.state, "websocket_connections"):
-        app.state.websocket_connections.clear()
 
 @pytest.fixture(scope="function")
 def api_key_headers() -> dict:
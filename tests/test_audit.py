@@ -1,7 +1,19 @@
+import json
+import os
+import time
 import pytest
+from collections import deque
 from fastapi import status
+from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
+from app.core.config import settings
+from app.models.models import AuditLog, Vehicle
+from app.services.audit_writer import audit_writer, PENDING_KEY
+from app.services import audit_archive as audit_archive_module
+from app.services.audit_archive import COLUMNS, audit_archive
+from app.services.services import audit_log_service, vehicle_service
+
 def test_get_audit_logs(client, api_key_headers, test_vehicle_data):
     """Test retrieving audit logs."""
     # Create a vehicle to generate audit logs
@@ -128,6 +140,355 @@ def test_audit_log_date_filtering(client, api_key_headers, test_vehicle_data):
     data = response.json()
     assert len(data["items"]) > 0
 
+def test_audit_log_cursor_pagination(client, api_key_headers, test_vehicle_data):
+    """Test keyset pagination of audit logs."""
+    for i in range(5):
+        test_vehicle_data["number_plate"] = f"CURSOR{i}"
+        client.post(
+            "/api/v1/vehicles",
+            json=test_vehicle_data,
+            headers=api_key_headers
+        )
+
+    # First page is offset based and carries a cursor
+    response = client.get(
+        "/api/v1/audit?per_page=2",
+        headers=api_key_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    first = response.json()
+    cursor = first["pagination"]["next_cursor"]
+    assert cursor
+
+    # Following page skips the count
+    response = client.get(
+        f"/api/v1/audit?per_page=2&cursor={cursor}",
+        headers=api_key_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    second = response.json()
+    assert len(second["items"]) == 2
+    assert second["pagination"]["total"] is None
+
+    # Cursor pages line up with offset pages
+    response = client.get(
+        "/api/v1/audit?page=2&per_page=2",
+        headers=api_key_headers
+    )
+    assert [log["id"] for log in second["items"]] == [
+        log["id"] for log in response.json()["items"]
+    ]
+
+    response = client.get(
+        "/api/v1/audit?cursor=not-a-cursor",
+        headers=api_key_headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_async_audit_mode(client, api_key_headers, test_vehicle_data, monkeypatch, tmp_path):
+    """Test audit events are written by the background writer in async mode."""
+    monkeypatch.setattr(settings, "AUDIT_MODE", "async")
+    monkeypatch.setattr(settings, "AUDIT_FLUSH_INTERVAL_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "AUDIT_SPOOL_PATH", str(tmp_path / "spool.jsonl"))
+
+    response = client.post(
+        "/api/v1/vehicles",
+        json=test_vehicle_data,
+        headers=api_key_headers
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    # The writer flushes on its own timer
+    deadline = time.monotonic() + 5
+    logs = []
+    while time.monotonic() < deadline:
+        response = client.get(
+            "/api/v1/audit/entity/Vehicle",
+            headers=api_key_headers
+        )
+        logs = [
+            log for log in response.json()["items"]
+            if test_vehicle_data["number_plate"] in log["details"]
+        ]
+        if logs:
+            break
+        time.sleep(0.05)
+    assert len(logs) == 1
+    assert logs[0]["action"] == "CREATE"
+
+def test_audit_spool_recovery(db, monkeypatch, tmp_path):
+    """Test events left in the spool are replayed, skipping acknowledged ones."""
+    spool = tmp_path / "spool.jsonl"
+    monkeypatch.setattr(settings, "AUDIT_SPOOL_PATH", str(spool))
+    events = [
+        {"action": "CREATE", "entity": "Vehicle", "entity_id": str(i),
+         "details": f"Created vehicle SPOOL{i}",
+         "timestamp": datetime.utcnow().isoformat(), "seq": i}
+        for i in (1, 2)
+    ]
+    spool.write_text("".join(json.dumps(e) + "\n" for e in events) + '{"torn')
+    (tmp_path / "spool.jsonl.ack").write_text("1")
+
+    assert audit_writer.recover(db) == 1
+    logs = db.query(AuditLog).all()
+    assert [log.details for log in logs] == ["Created vehicle SPOOL2"]
+    assert not spool.exists()
+
+def test_audit_spool_recovery_skips_running_workers(db, monkeypatch, tmp_path):
+    """Test only spools of stopped workers are replayed."""
+    fcntl = pytest.importorskip("fcntl")
+    base = tmp_path / "spool.jsonl"
+    monkeypatch.setattr(settings, "AUDIT_SPOOL_PATH", str(base))
+
+    def spool(pid, plate):
+        path = tmp_path / f"spool.jsonl.{pid}"
+        path.write_text(json.dumps({
+            "action": "CREATE", "entity": "Vehicle", "entity_id": "1",
+            "details": f"Created vehicle {plate}",
+            "timestamp": datetime.utcnow().isoformat(), "seq": 1
+        }) + "\n")
+        return path
+
+    dead = spool(1, "DEAD")
+    live = spool(2, "LIVE")
+    with open(live) as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        assert audit_writer.recover(db) == 1
+    assert [log.details for log in db.query(AuditLog).all()] == ["Created vehicle DEAD"]
+    assert not dead.exists()
+    assert live.exists()
+
+def test_audit_spool_is_compacted_under_load(monkeypatch, tmp_path):
+    """Test acknowledged events leave the spool while others are still queued."""
+    monkeypatch.setattr(settings, "AUDIT_SPOOL_PATH", str(tmp_path / "spool.jsonl"))
+    monkeypatch.setattr(settings, "AUDIT_BATCH_SIZE", 10)
+    monkeypatch.setattr(audit_writer, "_queue", deque())
+    spool = tmp_path / f"spool.jsonl.{os.getpid()}"
+    try:
+        # The queue never drains: more events arrive than each batch writes
+        for _ in range(20):
+            audit_writer.submit([
+                {"action": "CREATE", "entity": "Vehicle", "entity_id": "1",
+                 "details": "Created vehicle", "timestamp": datetime.utcnow()}
+                for _ in range(15)
+            ])
+            batch = [audit_writer._queue.popleft() for _ in range(10)]
+            audit_writer._acknowledge(batch[-1]["seq"], len(batch))
+
+            queued = {e["seq"] for e in audit_writer._queue}
+            spooled = [json.loads(line)["seq"] for line in spool.read_text().splitlines()]
+            assert queued <= set(spooled)
+            assert len(spooled) < 2 * len(queued) + 10
+    finally:
+        audit_writer._spool.close()
+        audit_writer._spool = audit_writer._spool_path = None
+
+def test_async_audit_mode_queues_cleanup_events(db, monkeypatch, tmp_path):
+    """Test retention cleanup queues its audit events in async mode."""
+    monkeypatch.setattr(settings, "AUDIT_MODE", "async")
+    monkeypatch.setattr(settings, "AUDIT_SPOOL_PATH", str(tmp_path / "spool.jsonl"))
+    monkeypatch.setattr(audit_writer, "_queue", deque())
+    db.add(Vehicle(
+        number_plate="EXPIRED1",
+        contact_name="Expired User",
+        phone_number="+1234567890",
+        entry_timestamp=datetime.utcnow() - timedelta(hours=48)
+    ))
+    db.commit()
+    try:
+        assert vehicle_service.cleanup_expired_vehicles(db) == 1
+        assert db.query(AuditLog).count() == 0
+        assert [e["details"] for e in audit_writer._queue] == [
+            "Vehicle EXPIRED1 removed due to retention policy"
+        ]
+    finally:
+        audit_writer._spool.close()
+        audit_writer._spool = audit_writer._spool_path = None
+
+def test_async_audit_rollback_discards_events(db_engine, monkeypatch):
+    """Test events of a rolled back transaction are never queued."""
+    monkeypatch.setattr(settings, "AUDIT_MODE", "async")
+    with Session(db_engine) as session:
+        vehicle = Vehicle(
+            number_plate="GONE",
+            contact_name="Test User",
+            phone_number="+1234567890",
+            entry_timestamp=datetime.utcnow()
+        )
+        session.add(vehicle)
+        session.flush()
+        audit_log_service.log_action(session, "CREATE", "Vehicle", str(vehicle.id), "Created vehicle GONE")
+        assert session.info[PENDING_KEY]
+
+        session.rollback()
+        assert PENDING_KEY not in session.info
+
+def test_audit_log_archival(db, monkeypatch, tmp_path):
+    """Test old audit logs move to segments and stay visible through get_logs."""
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(tmp_path))
+    now = datetime.utcnow()
+    for i, age in enumerate([0, 0, 40, 40, 45]):
+        db.add(AuditLog(
+            action="CREATE",
+            entity="Vehicle" if i % 2 == 0 else "SystemConfig",
+            entity_id=str(i),
+            details=f"Log {i}",
+            timestamp=now - timedelta(days=age, minutes=i)
+        ))
+    db.commit()
+
+    assert audit_log_service.archive_logs(db, older_than_days=30) == 3
+    assert db.query(AuditLog).count() == 2
+    assert sorted(os.listdir(tmp_path)) == sorted([
+        f"audit_{(now - timedelta(days=40, minutes=2)).date().isoformat()}.seg",
+        f"audit_{(now - timedelta(days=45, minutes=4)).date().isoformat()}.seg",
+        ".archive.lock",
+        "manifest.json"
+    ])
+
+    # Offset pages run from the table into the archive
+    page = audit_log_service.get_logs(db, limit=3)
+    assert page.total == 5
+    assert [log.details for log in page.items] == ["Log 0", "Log 1", "Log 2"]
+    page = audit_log_service.get_logs(db, skip=3, limit=3)
+    assert [log.details for log in page.items] == ["Log 3", "Log 4"]
+    assert page.next_cursor is None
+
+    # So do cursor pages
+    page = audit_log_service.get_logs(db, limit=2)
+    assert page.next_cursor
+    page = audit_log_service.get_logs(db, limit=2, cursor=page.next_cursor)
+    assert [log.details for log in page.items] == ["Log 2", "Log 3"]
+    page = audit_log_service.get_logs(db, limit=2, cursor=page.next_cursor)
+    assert [log.details for log in page.items] == ["Log 4"]
+    assert page.next_cursor is None
+
+    # Filters apply to archived rows
+    page = audit_log_service.get_logs(
+        db,
+        entity="Vehicle",
+        start_date=now - timedelta(days=41),
+        end_date=now - timedelta(days=1)
+    )
+    assert page.total == 1
+    assert [log.details for log in page.items] == ["Log 2"]
+
+def test_audit_archive_is_exclusive_and_merges(db, monkeypatch, tmp_path):
+    """Test one archiver per directory, and rows left after a crash merge by id."""
+    fcntl = pytest.importorskip("fcntl")
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "AUDIT_SEGMENT_CACHE_ROWS", 1)
+    old = datetime.utcnow().replace(hour=12) - timedelta(days=40)
+    for i in range(5):
+        db.add(AuditLog(
+            action="CREATE", entity="Vehicle", entity_id=str(i),
+            details=f"Log {i}", timestamp=old + timedelta(minutes=i)
+        ))
+    db.commit()
+
+    # Another worker is archiving
+    with open(tmp_path / ".archive.lock", "a") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        assert audit_log_service.archive_logs(db, older_than_days=30) == 0
+    assert db.query(AuditLog).count() == 5
+
+    assert audit_log_service.archive_logs(db, older_than_days=30) == 5
+    # A crash after the segment was written left two rows in the table too
+    for i in (1, 3):
+        db.add(AuditLog(
+            id=i + 1, action="CREATE", entity="Vehicle", entity_id=str(i),
+            details=f"Log {i}", timestamp=old + timedelta(minutes=i)
+        ))
+    db.commit()
+    assert audit_log_service.archive_logs(db, older_than_days=30) == 2
+
+    page = audit_log_service.get_logs(db, limit=10)
+    assert page.total == 5
+    assert [log.details for log in page.items] == [f"Log {i}" for i in range(4, -1, -1)]
+
+def test_audit_segments_are_columnar(db, monkeypatch, tmp_path):
+    """Test segments store row groups of column blocks that reads can skip."""
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "AUDIT_SEGMENT_CACHE_ROWS", 1)
+    monkeypatch.setattr(audit_archive_module, "ROWS_PER_GROUP", 2)
+    old = datetime.utcnow().replace(hour=12) - timedelta(days=40)
+    for i in range(5):
+        db.add(AuditLog(
+            action="CREATE", entity="Vehicle", entity_id=str(i),
+            details=f"Log {i}", timestamp=old + timedelta(minutes=i)
+        ))
+    db.commit()
+    assert audit_log_service.archive_logs(db, older_than_days=30) == 5
+
+    path = audit_archive.segment_path(old.date())
+    with open(path, "rb") as segment:
+        footer = audit_archive._footer(segment)
+    assert [group["rows"] for group in footer["groups"]] == [2, 2, 1]
+    assert all(len(group["blocks"]) == len(COLUMNS) for group in footer["groups"])
+
+    # Only the groups overlapping the range are decoded, one column each
+    details = [
+        values[0] for values in audit_archive._stream_segment(
+            path, ("details",), start_date=old + timedelta(minutes=1, seconds=30)
+        )
+    ]
+    assert details == ["Log 4", "Log 3", "Log 2", "Log 1"]
+    assert audit_archive.count(
+        start_date=old + timedelta(minutes=1), end_date=old + timedelta(minutes=3)
+    ) == 3
+
+def test_export_audit_logs(client, api_key_headers, test_vehicle_data):
+    """Test streaming audit log export with filters."""
+    client.post(
+        "/api/v1/vehicles",
+        json=test_vehicle_data,
+        headers=api_key_headers
+    )
+    client.delete(
+        f"/api/v1/vehicles/{test_vehicle_data['number_plate']}",
+        headers=api_key_headers
+    )
+
+    start_date = (datetime.utcnow() - timedelta(minutes=5)).isoformat()
+    response = client.get(
+        f"/api/v1/audit/export?entity=Vehicle&start_date={start_date}",
+        headers=api_key_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    actions = [
+        row["action"] for row in rows
+        if test_vehicle_data["number_plate"] in row["details"]
+    ]
+    assert actions == ["DELETE", "CREATE"]  # Newest first
+    assert all(row["entity"] == "Vehicle" for row in rows)
+
+    response = client.get(
+        "/api/v1/audit/export?format=csv&entity=Nothing",
+        headers=api_key_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text.splitlines() == [
+        "id,action,entity,entity_id,details,timestamp"
+    ]
+
+def test_audit_log_total_modes(client, api_key_headers, test_vehicle_data):
+    """Test the audit listing's estimated total tracks new entries."""
+    response = client.get("/api/v1/audit?total_mode=estimate", headers=api_key_headers)
+    before = response.json()["pagination"]["total"]
+
+    client.post("/api/v1/vehicles", json=test_vehicle_data, headers=api_key_headers)
+    response = client.get("/api/v1/audit?total_mode=estimate", headers=api_key_headers)
+    assert response.json()["pagination"]["total"] == before + 1
+    response = client.get("/api/v1/audit", headers=api_key_headers)
+    assert response.json()["pagination"]["total"] == before + 1
+
+    response = client.get("/api/v1/audit?per_page=1&total_mode=none", headers=api_key_headers)
+    pagination = response.json()["pagination"]
+    assert pagination["total"] is None
+    assert pagination["has_more"] is (before + 1 > 1)
+
 def test_unauthorized_audit_access(client):
     """Test unauthorized access to audit logs."""
     response = client.get("/api/v1/audit")
@@ -137,4 +498,7 @@ def test_unauthorized_audit_access(client):
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
     response = client.get("/api/v1/audit/entity/Vehicle")
-    assert response.status_code == status.HTTP_401_UNAUTHORIZED
\ No newline at end of file
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = client.get("/api/v1/audit/export")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
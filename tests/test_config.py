@@ -1,6 +1,9 @@
 from fastapi import status
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.database import engine
+
 
 def test_get_retention_period(client, api_key_headers):
     """Test getting retention period."""
@@ -84,6 +87,29 @@ def test_clear_database(client, api_key_headers, test_vehicle_data):
     assert data["records_removed"] >= 0
 
 
+def test_retention_period_cache_invalidation(client, api_key_headers):
+    """Test cached retention period follows updates and database clears."""
+    # Prime the cache
+    response = client.get("/api/v1/config/retention", headers=api_key_headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    client.put(
+        "/api/v1/config/retention",
+        json={"retention_hours": 72},
+        headers=api_key_headers
+    )
+    response = client.get("/api/v1/config/retention", headers=api_key_headers)
+    assert response.json()["retention_hours"] == 72
+
+    client.post(
+        "/api/v1/config/maintenance/clear",
+        json={"confirmation": "I understand this will delete all data"},
+        headers=api_key_headers
+    )
+    response = client.get("/api/v1/config/retention", headers=api_key_headers)
+    assert response.json()["retention_hours"] == 24
+
+
 def test_unauthorized_config_access(client, test_config_data):
     """Test unauthorized access to configuration endpoints."""
     # Try to get retention period without API key
@@ -102,4 +128,38 @@ def test_unauthorized_config_access(client, test_config_data):
         "/api/v1/config/maintenance/clear",
         json={"confirmation": "I understand this will delete all data"}
     )
-    assert response.status_code == status.HTTP_401_UNAUTHORIZED
\ No newline at end of file
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_health_check(client):
+    """Test health check reports the database through the async engine."""
+    response = client.get("/health")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["components"]["database"]["status"] == "healthy"
+    assert data["components"]["database"]["latency_ms"] is not None
+
+
+def test_sqlite_performance_profile():
+    """Test new SQLite connections get the configured pragmas."""
+    with engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+        synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+        busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+    assert journal_mode == settings.SQLITE_JOURNAL_MODE.lower()
+    assert synchronous == 1  # NORMAL
+    assert busy_timeout == settings.SQLITE_BUSY_TIMEOUT_MS
+
+
+def test_multi_worker_conflicts(monkeypatch):
+    """Test per-process features are refused with several workers."""
+    assert settings.multi_worker_conflicts() == []
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    assert settings.multi_worker_conflicts() == ["WS_OCCUPANCY_FEED=true (set it to false)"]
+
+    monkeypatch.setattr(settings, "WS_OCCUPANCY_FEED", False)
+    assert settings.multi_worker_conflicts() == []
+    monkeypatch.setattr(settings, "PLATE_INDEX_REFRESH_SECONDS", 0)
+    assert settings.multi_worker_conflicts() == [
+        "PLATE_INDEX_REFRESH_SECONDS=0 (set a refresh interval)"
+    ]
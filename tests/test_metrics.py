@@ -0,0 +1,151 @@
+import os
+import socket
+import subprocess
+import sys
+import logging
+import textwrap
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.db_metrics import fingerprint, timed_pool_class
+
+ROOT = Path(__file__).resolve().parent.parent
+
+WORKER = textwrap.dedent("""
+    import sys
+    import urllib.request
+    from prometheus_client import Counter, Gauge
+    from app.core import metrics
+
+    hits = Counter("worker_hits", "Hits")
+    hits.inc(3)
+    live = Gauge("worker_live", "Live", multiprocess_mode="livesum")
+    metrics.gauge_function(live, lambda: 7)
+    metrics.refresh_function_gauges()
+
+    if sys.argv[1] == "exit":
+        metrics.mark_process_dead()
+    else:
+        port = metrics.start_metrics_server()
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            print(response.read().decode())
+""")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_multiprocess_metrics_on_dedicated_port(tmp_path):
+    """Test metrics of every worker are aggregated on METRICS_PORT."""
+    env = dict(
+        os.environ,
+        PROMETHEUS_MULTIPROC_DIR=str(tmp_path),
+        METRICS_PORT=str(free_port()),
+        ENABLE_METRICS="true",
+        TESTING="false"
+    )
+
+    def run(mode: str) -> str:
+        return subprocess.run(
+            [sys.executable, "-c", WORKER, mode],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+
+    run("exit")  # A worker that has already stopped
+    output = run("serve")
+    # Counters keep the stopped worker's increments, live gauges drop them
+    assert "worker_hits_total 6.0" in output
+    assert "worker_live 7.0" in output
+
+
+def test_metrics_server_is_opt_in_and_reports_bind_failures(monkeypatch, caplog):
+    """Test no listener is opened by default or in tests, and a taken port is logged."""
+    assert metrics.start_metrics_server() is None  # TESTING
+    monkeypatch.setattr(settings, "TESTING", False)
+    monkeypatch.setattr(settings, "METRICS_PORT", 0)
+    assert metrics.start_metrics_server() is None
+
+    with socket.socket() as taken:
+        taken.bind(("0.0.0.0", 0))
+        taken.listen()
+        monkeypatch.setattr(settings, "METRICS_PORT", taken.getsockname()[1])
+        with caplog.at_level(logging.WARNING, logger="app.core.metrics"):
+            assert metrics.start_metrics_server() is None
+    assert "Metrics server not started" in caplog.text
+
+
+def test_statement_fingerprint():
+    """Test statements differing only in values share a fingerprint."""
+    assert fingerprint(
+        "SELECT * FROM vehicles WHERE number_plate = 'AB12' AND id IN (?, ?, ?) LIMIT 10"
+    ) == "SELECT * FROM vehicles WHERE number_plate = ? AND id IN (?) LIMIT ?"
+    assert fingerprint(
+        "INSERT INTO audit_logs (action, entity) VALUES (?, ?), (?, ?), (?, ?)"
+    ) == fingerprint("INSERT INTO audit_logs (action, entity)\n VALUES (:a, :b)")
+
+
+def test_query_metrics(client, api_key_headers, test_vehicle_data):
+    """Test statement timings and per-request query counts are exported."""
+    client.post("/api/v1/vehicles", json=test_vehicle_data, headers=api_key_headers)
+    client.get(
+        f"/api/v1/vehicles/{test_vehicle_data['number_plate']}",
+        headers=api_key_headers
+    )
+
+    metrics = client.get("/metrics").text
+    assert 'db_query_duration_seconds_count{statement="INSERT INTO vehicles' in metrics
+    assert (
+        'db_queries_per_request_count{endpoint="/api/v1/vehicles/{number}",method="GET"}'
+        in metrics
+    )
+    assert "db_pool_checkout_seconds_count" in metrics
+    assert test_vehicle_data["number_plate"] not in metrics
+
+
+def test_request_metrics_use_route_templates(client, api_key_headers, test_vehicle_data):
+    """Test request metrics are labelled by route template, not raw path."""
+    plate = test_vehicle_data["number_plate"]
+    client.post("/api/v1/vehicles", json=test_vehicle_data, headers=api_key_headers)
+    client.get(f"/api/v1/vehicles/{plate}", headers=api_key_headers)
+    client.get("/no/such/path/12345")
+
+    metrics = client.get("/metrics").text
+    assert 'endpoint="/api/v1/vehicles/{number}"' in metrics
+    assert 'endpoint="unmatched"' in metrics
+    assert plate not in metrics
+    assert "/no/such/path" not in metrics
+    assert 'http_requests_in_progress{endpoint="/api/v1/vehicles",method="POST"} 0.0' in metrics
+    assert 'http_request_size_bytes_count{endpoint="/api/v1/vehicles",method="POST"}' in metrics
+    assert 'http_response_size_bytes_count{endpoint="/api/v1/vehicles/{number}",method="GET"}' in metrics
+
+
+def test_pool_checkout_timing_survives_dispose(tmp_path):
+    """Test engines built with the timed pool keep timing after dispose()."""
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, poolclass=timed_pool_class(url))
+    before = REGISTRY.get_sample_value("db_pool_checkout_seconds_count")
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+    assert isinstance(engine.pool, timed_pool_class(url))
+    assert REGISTRY.get_sample_value("db_pool_checkout_seconds_count") == before + 1
+    engine.dispose()
+
+
+def test_slow_query_log(client, api_key_headers, monkeypatch, caplog):
+    """Test statements over the threshold are logged with their plan."""
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.000001)
+    with caplog.at_level(logging.WARNING, logger="app.core.db_metrics"):
+        client.get("/api/v1/vehicles", headers=api_key_headers)
+
+    slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Slow query")]
+    assert any("FROM vehicles" in message for message in slow)
+    # EXPLAIN QUERY PLAN output, e.g. "SCAN vehicles USING INDEX ..."
+    assert any("\n  " in message and "vehicles" in message.split("\n", 1)[1] for message in slow)
@@ -0,0 +1,78 @@
+import pytest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+from app.services.services import vehicle_service, audit_log_service
+
+
+@contextmanager
+def capture_statements(engine):
+    """Record (statement, parameters) for every query sent to the engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def query_plan(db, statement: str, parameters) -> str:
+    """Return the SQLite EXPLAIN QUERY PLAN output as one string."""
+    rows = db.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    ).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def plans_for(db, statements, prefix: str) -> list:
+    """Query plans of the captured statements starting with prefix."""
+    return [
+        query_plan(db, statement, parameters)
+        for statement, parameters in statements
+        if statement.lstrip().startswith(prefix)
+    ]
+
+
+def test_vehicle_list_uses_entry_timestamp_index(db, db_engine):
+    """Test list() walks the (entry_timestamp, id) index without sorting."""
+    with capture_statements(db_engine) as statements:
+        vehicle_service.list(db, 0, 10)
+
+    plans = plans_for(db, statements, "SELECT vehicles.id")
+    assert plans
+    for plan in plans:
+        assert "ix_vehicles_entry_timestamp_id" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+def test_cleanup_uses_entry_timestamp_index(db, db_engine):
+    """Test the cleanup cutoff is a range search on entry_timestamp."""
+    with capture_statements(db_engine) as statements:
+        vehicle_service.cleanup_expired_vehicles(db)
+
+    plans = plans_for(db, statements, "DELETE FROM vehicles")
+    assert plans
+    for plan in plans:
+        assert "ix_vehicles_entry_timestamp_id (entry_timestamp<?)" in plan
+
+
+@pytest.mark.parametrize("filters, index", [
+    ({}, "ix_audit_logs_timestamp"),
+    ({"start_date": datetime.utcnow() - timedelta(days=1)}, "ix_audit_logs_timestamp"),
+    ({"entity": "Vehicle"}, "ix_audit_logs_entity_timestamp"),
+])
+def test_audit_logs_use_timestamp_indexes(db, db_engine, filters, index):
+    """Test get_logs filters and orders through the audit indexes."""
+    with capture_statements(db_engine) as statements:
+        audit_log_service.get_logs(db, limit=10, **filters)
+
+    plans = plans_for(db, statements, "SELECT audit_logs.id")
+    assert plans
+    for plan in plans:
+        assert index in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,60 @@
+import uuid
+import pytest
+
+from app.core.rate_limit import (
+    RateLimiter, RateLimitBackend, MemoryBackend, SharedMemoryBackend
+)
+
+
+def test_sliding_window_limits_and_recovers(monkeypatch):
+    """Test the limit holds within a window and decays over the next one."""
+    clock = [600.0]
+    monkeypatch.setattr("app.core.rate_limit.time.monotonic", lambda: clock[0])
+    limiter = RateLimiter(10, window_seconds=60, backend=MemoryBackend())
+
+    assert all(limiter.is_allowed("key") for _ in range(10))
+    assert not limiter.is_allowed("key")
+    assert limiter.is_allowed("other")
+
+    # Halfway through the next window half of the old requests still count
+    clock[0] += 90
+    assert sum(limiter.is_allowed("key") for _ in range(10)) == 5
+
+    # Two windows later the key starts fresh
+    clock[0] += 120
+    assert sum(limiter.is_allowed("key") for _ in range(20)) == 10
+
+
+def test_incomplete_backend_cannot_be_created():
+    """Test a backend missing methods fails when built, not on first use."""
+    class NoClear(RateLimitBackend):
+        lock = MemoryBackend.lock
+        get = MemoryBackend.get
+        set = MemoryBackend.set
+
+    with pytest.raises(TypeError):
+        NoClear()
+
+
+def test_shared_memory_backend_is_shared():
+    """Test limiters attached to the same block share counters."""
+    pytest.importorskip("fcntl")
+    name = f"parking_test_{uuid.uuid4().hex[:8]}"
+    first = SharedMemoryBackend(name, slots=64)
+    try:
+        # A second worker attaches to the existing block
+        second = SharedMemoryBackend(name, slots=64)
+        worker_a = RateLimiter(6, backend=first)
+        worker_b = RateLimiter(6, backend=second)
+
+        allowed = [
+            limiter.is_allowed("api-key")
+            for limiter in (worker_a, worker_b) * 4
+        ]
+        assert allowed.count(True) == 6
+
+        worker_a.reset()
+        assert worker_b.is_allowed("api-key")
+    finally:
+        second.close()
+        first.close(unlink=True)
@@ -0,0 +1,89 @@
+from fastapi import status
+from datetime import datetime, timedelta
+
+from app.models.models import Vehicle
+from app.services.occupancy_stats import OccupancyStats
+
+
+def test_occupancy_stats(client, api_key_headers, test_vehicle_data):
+    """Test the stats endpoint follows entries and exits."""
+    response = client.get("/api/v1/stats", headers=api_key_headers)
+    assert response.status_code == status.HTTP_200_OK
+    before = response.json()
+    parked = client.get("/api/v1/vehicles", headers=api_key_headers).json()
+    assert before["parked"] == parked["pagination"]["total"]
+    assert len(before["hourly"]) == before["window_hours"]
+
+    client.post("/api/v1/vehicles", json=test_vehicle_data, headers=api_key_headers)
+    response = client.get("/api/v1/stats", headers=api_key_headers)
+    data = response.json()
+    assert data["parked"] == before["parked"] + 1
+    assert data["entries_current_hour"] == before["entries_current_hour"] + 1
+    assert data["hourly"][-1]["entries"] == data["entries_current_hour"]
+
+    client.delete(
+        f"/api/v1/vehicles/{test_vehicle_data['number_plate']}",
+        headers=api_key_headers
+    )
+    data = client.get("/api/v1/stats", headers=api_key_headers).json()
+    assert data["parked"] == before["parked"]
+    assert data["exits_current_hour"] == before["exits_current_hour"] + 1
+
+    client.post(
+        "/api/v1/config/maintenance/clear",
+        json={"confirmation": "I understand this will delete all data"},
+        headers=api_key_headers
+    )
+    data = client.get("/api/v1/stats", headers=api_key_headers).json()
+    assert data["parked"] == 0
+
+
+def test_occupancy_stats_ring_buffer(db):
+    """Test hours roll out of the window as time moves on."""
+    stats = OccupancyStats(hours=3)
+    stats.rebuild(db)
+    start = datetime(2025, 1, 1, 10, 30)
+
+    class Entry:
+        entry_timestamp = start
+
+    stats.entered([Entry(), Entry()])
+    stats.exited(1, "removed", start + timedelta(hours=1))
+    snapshot = stats.snapshot(start + timedelta(hours=1))
+    assert snapshot["parked"] == 1
+    assert [h["entries"] for h in snapshot["hourly"]] == [0, 2, 0]
+    assert [h["exits"] for h in snapshot["hourly"]] == [0, 0, 1]
+    assert snapshot["hourly"][1]["hour"] == datetime(2025, 1, 1, 10)
+
+    # Three hours on, the 10:00 slot has been reused
+    Entry.entry_timestamp = start + timedelta(hours=3)
+    stats.entered([Entry()])
+    snapshot = stats.snapshot(start + timedelta(hours=3))
+    assert [h["entries"] for h in snapshot["hourly"]] == [0, 0, 1]
+    assert snapshot["entries_in_window"] == 1
+    assert snapshot["exits_in_window"] == 1
+    assert snapshot["parked"] == 2
+
+
+def test_unauthorized_stats_access(client):
+    """Test the stats endpoint requires an API key."""
+    response = client.get("/api/v1/stats")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_occupancy_stats_recount(db):
+    """Test the parked count follows the table, whoever changed it."""
+    stats = OccupancyStats(hours=3)
+    parked = stats.rebuild(db)
+
+    # Another worker registers a vehicle
+    db.add(Vehicle(
+        number_plate="RECOUNT1",
+        contact_name="Test User",
+        phone_number="+1234567890",
+        entry_timestamp=datetime.utcnow()
+    ))
+    db.commit()
+    assert stats.parked == parked
+    assert stats.recount(db) == parked + 1
+    assert stats.snapshot()["parked"] == parked + 1
@@ -1,6 +1,17 @@
+import csv
+import io
+import json
 import pytest
 from fastapi import status
 from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+
+from app.models.models import Vehicle, AuditLog
+from app.schemas import schemas
+from app.services.services import vehicle_service
+from app.services.search_cache import SearchCache
+from app.services.row_counts import row_counts
+from prometheus_client import REGISTRY
 
 def test_create_vehicle(client, api_key_headers, test_vehicle_data):
     """Test vehicle registration endpoint."""
@@ -149,6 +160,297 @@ def test_search_vehicles(client, api_key_headers):
     assert len(data["items"]) == 1
     assert data["items"][0]["number_plate"] == "XYZ789"
 
+def test_search_vehicles_substring(client, api_key_headers):
+    """Test search matches substrings case-insensitively."""
+    client.post(
+        "/api/v1/vehicles",
+        json={
+            "number_plate": "KL07AB1234",
+            "contact_name": "Maria Gonzalez",
+            "phone_number": "+1234567890"
+        },
+        headers=api_key_headers
+    )
+
+    # Indexed (trigram) path
+    response = client.get(
+        "/api/v1/vehicles/search/07ab12",
+        headers=api_key_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    plates = [item["number_plate"] for item in response.json()["items"]]
+    assert "KL07AB1234" in plates
+
+    response = client.get(
+        "/api/v1/vehicles/search/GONZ",
+        headers=api_key_headers
+    )
+    plates = [item["number_plate"] for item in response.json()["items"]]
+    assert "KL07AB1234" in plates
+
+    # Terms shorter than a trigram fall back to a scan
+    response = client.get(
+        "/api/v1/vehicles/search/l0",
+        headers=api_key_headers
+    )
+    plates = [item["number_plate"] for item in response.json()["items"]]
+    assert "KL07AB1234" in plates
+
+
+def test_list_vehicles_cursor_pagination(client, api_key_headers, test_vehicle_data):
+    """Test walking the vehicle list with keyset cursors."""
+    for i in range(3):
+        test_vehicle_data["number_plate"] = f"PAGE{i}"
+        client.post(
+            "/api/v1/vehicles",
+            json=test_vehicle_data,
+            headers=api_key_headers
+        )
+
+    response = client.get(
+        "/api/v1/vehicles?limit=2",
+        headers=api_key_headers
+    )
+    data = response.json()
+    seen = [item["id"] for item in data["items"]]
+    cursor = data["pagination"]["next_cursor"]
+    while cursor:
+        response = client.get(
+            f"/api/v1/vehicles?limit=2&cursor={cursor}",
+            headers=api_key_headers
+        )
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["pagination"]["total"] is None
+        seen.extend(item["id"] for item in data["items"])
+        cursor = data["pagination"]["next_cursor"]
+
+    # Every vehicle is visited exactly once
+    assert len(seen) == len(set(seen))
+    response = client.get("/api/v1/vehicles", headers=api_key_headers)
+    assert len(seen) == response.json()["pagination"]["total"]
+
+    # Cursors only make sense for the timestamp ordering
+    response = client.get(
+        "/api/v1/vehicles?order_by=number_plate&cursor=x",
+        headers=api_key_headers
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_cleanup_expired_vehicles(db):
+    """Test expired vehicles are purged in batches with audit entries."""
+    expired = datetime.utcnow() - timedelta(hours=48)
+    for i in range(5):
+        db.add(Vehicle(
+            number_plate=f"OLD{i}",
+            contact_name="Expired User",
+            phone_number="+1234567890",
+            entry_timestamp=expired + timedelta(minutes=i)
+        ))
+    db.add(Vehicle(
+        number_plate="FRESH1",
+        contact_name="Current User",
+        phone_number="+1234567890",
+        entry_timestamp=datetime.utcnow()
+    ))
+    db.commit()
+
+    removed = vehicle_service.cleanup_expired_vehicles(db, batch_size=2)
+    assert removed == 5
+
+    plates = [v.number_plate for v in db.query(Vehicle).all()]
+    assert plates == ["FRESH1"]
+
+    logs = db.query(AuditLog).filter(AuditLog.action == "DELETE").all()
+    assert len(logs) == 5
+    assert all("retention policy" in log.details for log in logs)
+
+def test_bulk_create_vehicles(client, api_key_headers, test_vehicle_data):
+    """Test bulk registration reports conflicts without aborting."""
+    client.post(
+        "/api/v1/vehicles",
+        json=test_vehicle_data,
+        headers=api_key_headers
+    )
+    items = [
+        {**test_vehicle_data, "number_plate": "BULK1"},
+        test_vehicle_data,  # Already parked
+        {**test_vehicle_data, "number_plate": "BULK2"},
+        {**test_vehicle_data, "number_plate": "BULK1"},  # Repeated in batch
+    ]
+    for plate in ("BULK1", "BULK2"):
+        client.delete(f"/api/v1/vehicles/{plate}", headers=api_key_headers)
+
+    response = client.post(
+        "/api/v1/vehicles/bulk",
+        json={"items": items},
+        headers=api_key_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [v["number_plate"] for v in data["created"]] == ["BULK1", "BULK2"]
+    assert [c["index"] for c in data["conflicts"]] == [1, 3]
+    assert data["conflicts"][0]["number_plate"] == test_vehicle_data["number_plate"]
+
+    response = client.get("/api/v1/vehicles/BULK2", headers=api_key_headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get("/api/v1/audit/entity/Vehicle?per_page=100", headers=api_key_headers)
+    details = [log["details"] for log in response.json()["items"]]
+    assert "Vehicle BULK2 registered" in details
+
+    # An empty batch is rejected by validation
+    response = client.post(
+        "/api/v1/vehicles/bulk",
+        json={"items": []},
+        headers=api_key_headers
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_export_vehicles(client, api_key_headers, test_vehicle_data):
+    """Test streaming vehicle export as NDJSON and CSV."""
+    plates = []
+    for i in range(3):
+        test_vehicle_data["number_plate"] = f"EXPORT{i}"
+        plates.append(test_vehicle_data["number_plate"])
+        client.post(
+            "/api/v1/vehicles",
+            json=test_vehicle_data,
+            headers=api_key_headers
+        )
+
+    response = client.get("/api/v1/vehicles/export", headers=api_key_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    exported = [row["number_plate"] for row in rows if row["number_plate"] in plates]
+    assert exported == plates  # Oldest first
+    assert set(rows[0]) == {
+        "id", "number_plate", "contact_name", "phone_number", "entry_timestamp"
+    }
+
+    response = client.get("/api/v1/vehicles/export?format=csv", headers=api_key_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["number_plate"] for row in rows if row["number_plate"] in plates] == plates
+
+    response = client.get("/api/v1/vehicles/export?format=xml", headers=api_key_headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_list_response_matches_schema(client, api_key_headers, test_vehicle_data):
+    """Test the directly encoded list response matches the declared schema."""
+    client.post(
+        "/api/v1/vehicles",
+        json=test_vehicle_data,
+        headers=api_key_headers
+    )
+
+    response = client.get("/api/v1/vehicles?limit=5", headers=api_key_headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert schemas.VehicleList.model_validate(data).model_dump(mode="json") == data
+    assert list(data["items"][0]) == list(schemas.VehicleResponse.model_fields)
+
+    # The OpenAPI schema still documents the response model
+    openapi = client.get("/api/openapi.json").json()
+    content = openapi["paths"]["/api/v1/vehicles"]["get"]["responses"]["200"]["content"]
+    assert content["application/json"]["schema"]["$ref"].endswith("/VehicleList")
+
+def test_search_results_cached_until_vehicles_change(client, api_key_headers, test_vehicle_data):
+    """Test repeated searches are served from the cache and writes invalidate it."""
+    def hits():
+        return REGISTRY.get_sample_value("search_cache_requests_total", {"result": "hit"}) or 0
+
+    test_vehicle_data["number_plate"] = "CACHE1"
+    client.post("/api/v1/vehicles", json=test_vehicle_data, headers=api_key_headers)
+
+    response = client.get("/api/v1/vehicles/search/cache", headers=api_key_headers)
+    assert [v["number_plate"] for v in response.json()["items"]] == ["CACHE1"]
+    before = hits()
+    response = client.get("/api/v1/vehicles/search/CACHE", headers=api_key_headers)
+    assert [v["number_plate"] for v in response.json()["items"]] == ["CACHE1"]
+    assert hits() == before + 1
+
+    # A new registration is visible immediately
+    test_vehicle_data["number_plate"] = "CACHE2"
+    client.post("/api/v1/vehicles", json=test_vehicle_data, headers=api_key_headers)
+    response = client.get("/api/v1/vehicles/search/cache", headers=api_key_headers)
+    assert sorted(v["number_plate"] for v in response.json()["items"]) == ["CACHE1", "CACHE2"]
+    assert hits() == before + 1
+
+    metrics = client.get("/metrics").text
+    assert "search_cache_hit_ratio" in metrics
+    assert "search_cache_evictions_total" in metrics
+
+def test_search_cache_rejects_results_from_before_a_write():
+    """Test a page computed while vehicles changed is not cached."""
+    cache = SearchCache()
+    generation = cache.generation
+    cache.invalidate()  # A write lands while the search runs
+    cache.put("term", "stale page", generation)
+    assert cache.get("term") is None
+
+    cache.put("term", "fresh page", cache.generation)
+    assert cache.get("term") == "fresh page"
+
+def test_list_vehicles_total_modes(client, api_key_headers, test_vehicle_data):
+    """Test estimated and skipped totals, and has_more."""
+    for i in range(3):
+        test_vehicle_data["number_plate"] = f"TOTAL{i}"
+        client.post("/api/v1/vehicles", json=test_vehicle_data, headers=api_key_headers)
+
+    response = client.get("/api/v1/vehicles?limit=2", headers=api_key_headers)
+    exact = response.json()["pagination"]
+    assert exact["total"] >= 3
+    assert exact["has_more"] is True
+
+    # The maintained count follows inserts and deletes
+    response = client.get("/api/v1/vehicles?limit=2&total_mode=estimate", headers=api_key_headers)
+    assert response.json()["pagination"]["total"] == exact["total"]
+    client.delete("/api/v1/vehicles/TOTAL0", headers=api_key_headers)
+    response = client.get("/api/v1/vehicles?limit=2&total_mode=estimate", headers=api_key_headers)
+    assert response.json()["pagination"]["total"] == exact["total"] - 1
+
+    response = client.get(
+        f"/api/v1/vehicles?skip={exact['total'] - 2}&limit=2&total_mode=none",
+        headers=api_key_headers
+    )
+    pagination = response.json()["pagination"]
+    assert pagination["total"] is None
+    assert pagination["total_pages"] is None
+    assert len(response.json()["items"]) == 1
+    assert pagination["has_more"] is False
+
+    response = client.get("/api/v1/vehicles?total_mode=guess", headers=api_key_headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_row_count_changes_apply_on_commit(db_engine):
+    """Test maintained counts ignore changes of rolled back transactions."""
+    table = Vehicle.__table__
+    with Session(db_engine) as session:
+        row_counts.invalidate(session, table)
+        count = row_counts.get(session, table)
+
+        def register(plate):
+            session.add(Vehicle(
+                number_plate=plate,
+                contact_name="Test User",
+                phone_number="+1234567890",
+                entry_timestamp=datetime.utcnow()
+            ))
+            session.flush()
+            row_counts.adjust(session, table, 1)
+
+        register("ROLLEDBACK")
+        session.rollback()
+        assert row_counts.get(session, table) == count
+
+        register("COMMITTED")
+        assert row_counts.get(session, table) == count
+        session.commit()
+        assert row_counts.get(session, table) == count + 1
+
 def test_unauthorized_access(client, test_vehicle_data):
     """Test unauthorized access is prevented."""
     response = client.post(
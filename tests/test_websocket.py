@@ -1,7 +1,17 @@
 import pytest
 from fastapi.testclient import TestClient
 import json
+import asyncio
 from app.core.config import settings
+from app.services.events import OccupancyHub
+from app.api.connection_manager import connection_manager
+from starlette.websockets import WebSocketDisconnect
+from prometheus_client import REGISTRY
+from datetime import datetime
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from app.models.models import Vehicle
+from app.services.plate_index import plate_index
 
 
 def test_websocket_connection(client, api_key_headers, test_vehicle_data):
@@ -103,9 +113,10 @@ def test_websocket_invalid_message_type(client):
         pytest.fail(f"WebSocket test failed: {str(e)}")
 
 
-def test_websocket_connection_limit(client, api_key_headers):
+def test_websocket_connection_limit(client, api_key_headers, monkeypatch):
     """Test WebSocket connection limit."""
     connections = []
+    monkeypatch.setattr(settings, "MAX_WEBSOCKET_CONNECTIONS", 5)
     max_connections = settings.MAX_WEBSOCKET_CONNECTIONS
     
     try:
@@ -144,4 +155,214 @@ def test_websocket_search_no_results(client):
             assert data["type"] == "search_results"
             assert len(data["results"]) == 0
     except Exception as e:
-        pytest.fail(f"WebSocket test failed: {str(e)}")
\ No newline at end of file
+        pytest.fail(f"WebSocket test failed: {str(e)}")
+
+def test_plate_index_refresh_picks_up_other_workers(db_engine):
+    """Test the index catches up with vehicles written by another process."""
+    with Session(db_engine) as session:
+        plate_index.rebuild(session)
+
+        # Another worker registers a vehicle
+        session.add(Vehicle(
+            number_plate="ELSEWHERE1",
+            contact_name="Other Worker",
+            phone_number="+1234567890",
+            entry_timestamp=datetime.utcnow()
+        ))
+        session.commit()
+        assert plate_index.search("ELSEWHERE") == []
+        assert plate_index.refresh(session) == 1
+        assert [v.number_plate for v in plate_index.search("ELSEWHERE")] == ["ELSEWHERE1"]
+
+        # ...and removes it
+        session.execute(delete(Vehicle))
+        session.commit()
+        assert plate_index.refresh(session) == -1
+        assert plate_index.search("ELSEWHERE") == []
+
+        # A vehicle registered here, then replaced elsewhere under the same id
+        local = Vehicle(
+            number_plate="LOCAL1",
+            contact_name="This Worker",
+            phone_number="+1234567890",
+            entry_timestamp=datetime.utcnow()
+        )
+        session.add(local)
+        session.commit()
+        plate_index.add(local)
+        assert plate_index.refresh(session) == 0
+        local_id = local.id
+        session.execute(delete(Vehicle))
+        session.add(Vehicle(
+            id=local_id,
+            number_plate="REUSED1",
+            contact_name="Other Worker",
+            phone_number="+1234567890",
+            entry_timestamp=datetime.utcnow()
+        ))
+        session.commit()
+        assert plate_index.refresh(session) == -1
+        assert plate_index.search("LOCAL") == []
+        assert [v.number_plate for v in plate_index.search("REUSED")] == ["REUSED1"]
+
+def test_websocket_search_reflects_removal(client, api_key_headers):
+    """Test WebSocket typeahead index tracks registrations and removals."""
+    vehicle = {
+        "number_plate": "TRIE-4821",
+        "contact_name": "Priya Raman",
+        "phone_number": "+1234567890"
+    }
+    client.delete(
+        f"/api/v1/vehicles/{vehicle['number_plate']}",
+        headers=api_key_headers
+    )
+    client.post("/api/v1/vehicles", json=vehicle, headers=api_key_headers)
+
+    with client.websocket_connect(
+        f"/ws/vehicles/search?api_key={settings.SECRET_KEY}"
+    ) as websocket:
+        # Plate substring, ignoring separators and case
+        websocket.send_json({"type": "search", "search_term": "ie48"})
+        data = websocket.receive_json()
+        assert [r["number_plate"] for r in data["results"]] == ["TRIE-4821"]
+
+        # Contact name word prefix
+        websocket.send_json({"type": "search", "search_term": "raman"})
+        data = websocket.receive_json()
+        assert "TRIE-4821" in [r["number_plate"] for r in data["results"]]
+
+        client.delete(
+            f"/api/v1/vehicles/{vehicle['number_plate']}",
+            headers=api_key_headers
+        )
+        websocket.send_json({"type": "search", "search_term": "ie48"})
+        data = websocket.receive_json()
+        assert data["results"] == []
+
+    response = client.get("/metrics")
+    assert "plate_index_vehicles" in response.text
+    assert "plate_index_lookups_total" in response.text
+
+
+def test_websocket_occupancy_feed(client, api_key_headers, test_vehicle_data, monkeypatch):
+    """Test subscribers receive entries and exits as they happen."""
+    with client.websocket_connect(
+        f"/ws/vehicles/search?api_key={settings.SECRET_KEY}"
+    ) as websocket:
+        websocket.send_json({"type": "subscribe"})
+        data = websocket.receive_json()
+        assert data["type"] == "subscribed"
+
+        client.post("/api/v1/vehicles", json=test_vehicle_data, headers=api_key_headers)
+        data = websocket.receive_json()
+        assert data["type"] == "occupancy"
+        assert [v["number_plate"] for v in data["entered"]] == [test_vehicle_data["number_plate"]]
+        assert data["exited"] == []
+
+        client.delete(
+            f"/api/v1/vehicles/{test_vehicle_data['number_plate']}",
+            headers=api_key_headers
+        )
+        data = websocket.receive_json()
+        assert data["exited"] == [test_vehicle_data["number_plate"]]
+        assert data["reason"] == "removed"
+
+        # Searches still work while subscribed
+        websocket.send_json({"type": "unsubscribe"})
+        assert websocket.receive_json()["type"] == "unsubscribed"
+        client.post("/api/v1/vehicles", json=test_vehicle_data, headers=api_key_headers)
+        websocket.send_json({"type": "search", "search_term": "NONEXISTENT"})
+        assert websocket.receive_json()["type"] == "search_results"
+
+        monkeypatch.setattr(settings, "WS_OCCUPANCY_FEED", False)
+        websocket.send_json({"type": "subscribe"})
+        assert websocket.receive_json()["code"] == "FEED_DISABLED"
+
+
+def test_occupancy_slow_consumer_dropped():
+    """Test a subscriber whose queue overflows is dropped, not blocking others."""
+    hub = OccupancyHub()
+
+    async def scenario():
+        slow = hub.subscribe(max_queue=2)
+        fast = hub.subscribe(max_queue=10)
+        for i in range(3):
+            hub.exited([f"PLATE{i}"], "removed")
+        await asyncio.sleep(0)  # Let the deliveries run
+
+        assert slow.dropped
+        assert await slow.get() is None
+        assert not fast.dropped
+        received = [(await fast.get())["exited"] for _ in range(3)]
+        assert received == [["PLATE0"], ["PLATE1"], ["PLATE2"]]
+
+    asyncio.run(scenario())
+
+
+def test_websocket_heartbeat_and_idle_eviction(client, monkeypatch):
+    """Test live connections are pinged and silent ones are evicted."""
+    with client.websocket_connect(
+        f"/ws/vehicles/search?api_key={settings.SECRET_KEY}"
+    ) as websocket:
+        websocket.send_json({"type": "search", "search_term": "NONEXISTENT"})
+        assert websocket.receive_json()["type"] == "search_results"
+        assert len(connection_manager.connections) == 1
+
+        # Sweep on the server's event loop, as the heartbeat task would
+        client.portal.call(connection_manager.sweep)
+        assert websocket.receive_json() == {"type": "ping"}
+        websocket.send_json({"type": "pong"})
+
+        # Events pushed to a client that sends nothing keep it connected
+        connection = next(iter(connection_manager.connections))
+        connection.last_activity -= settings.WS_IDLE_TIMEOUT_SECONDS + 1
+        client.portal.call(connection.send, {"type": "occupancy"})
+        assert websocket.receive_json() == {"type": "occupancy"}
+        client.portal.call(connection_manager.sweep)
+        assert websocket.receive_json() == {"type": "ping"}
+
+        monkeypatch.setattr(settings, "WS_IDLE_TIMEOUT_SECONDS", -1)
+        client.portal.call(connection_manager.sweep)
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            websocket.receive_json()
+        assert exc_info.value.code == 1000
+
+    assert len(connection_manager.connections) == 0
+    response = client.get("/metrics")
+    assert "websocket_connections" in response.text
+    assert 'websocket_messages_total{direction="in",type="search"}' in response.text
+    assert "websocket_idle_evictions_total" in response.text
+
+
+def test_websocket_search_coalescing(client, monkeypatch):
+    """Test rapid searches are coalesced so only the latest is answered."""
+    monkeypatch.setattr(settings, "WS_SEARCH_DEBOUNCE_MS", 200)
+    superseded = REGISTRY.get_sample_value("websocket_searches_superseded_total")
+    with client.websocket_connect(
+        f"/ws/vehicles/search?api_key={settings.SECRET_KEY}"
+    ) as websocket:
+        for request_id, term in enumerate(["NO", "NON", "NONE"]):
+            websocket.send_json({
+                "type": "search",
+                "search_term": term,
+                "request_id": request_id
+            })
+        data = websocket.receive_json()
+        assert data["type"] == "search_results"
+        assert data["request_id"] == 2
+
+        # Nothing stale follows: the next message answers the next search
+        monkeypatch.setattr(settings, "WS_SEARCH_DEBOUNCE_MS", 0)
+        websocket.send_json({"type": "search", "search_term": "XY", "request_id": "next"})
+        assert websocket.receive_json()["request_id"] == "next"
+
+        # A term too short to search cancels the pending one
+        monkeypatch.setattr(settings, "WS_SEARCH_DEBOUNCE_MS", 200)
+        websocket.send_json({"type": "search", "search_term": "AB", "request_id": 3})
+        websocket.send_json({"type": "search", "search_term": "A", "request_id": 4})
+        data = websocket.receive_json()
+        assert (data["code"], data["request_id"]) == ("INVALID_SEARCH", 4)
+        websocket.send_json({"type": "search", "search_term": "CD", "request_id": 5})
+        assert websocket.receive_json()["request_id"] == 5
+
+    assert REGISTRY.get_sample_value("websocket_searches_superseded_total") == superseded + 3